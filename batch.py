@@ -0,0 +1,115 @@
+"""
+Headless batch mode for the log parser.
+
+Scans directory trees for robot_autolog_*.log and autolog_*.log files
+(compressed copies included), parses them in parallel worker processes and
+writes one JSON summary per file to a JSONL file: system config, row counts,
+error rows, error clusters and the slowest activities.
+
+    python batch.py /srv/logs --workers 8 --output summaries.jsonl
+
+Summaries are written as files finish, in completion order. Only a few files
+are queued per worker and each worker keeps just the grid columns of the file
+it is parsing, so memory stays bounded however many files are found.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import logengine
+
+PATTERNS = ("robot_autolog_*.log", "autolog_*.log")
+QUEUED_PER_WORKER = 2  # Files submitted ahead of the workers
+
+
+def find_logs(roots, patterns=PATTERNS):
+    """
+    Yield the log files under roots whose names match patterns, in a stable order.
+    Compressed logs match by the name they have once decompressed; files named
+    directly in roots are always taken.
+    """
+    for root in roots:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for directory, subdirectories, files in os.walk(root):
+            subdirectories.sort()
+            for name in sorted(files):
+                base, extension = os.path.splitext(name)
+                if extension.lower() in logengine.COMPRESSED_OPENERS:
+                    name = base
+                if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                    yield os.path.join(directory, base + extension)
+
+
+def summarize(path, activity_filter, error_filter, max_error_rows, top):
+    """
+    Summary of one log file. Runs in a worker process; a file that can't be
+    parsed gets an error summary instead of stopping the batch.
+    """
+    line_filter = None
+    if activity_filter or error_filter != "Any":
+        line_filter = logengine.LineFilter(activity_filter, error_filter)
+    try:
+        return logengine.summarize_log(path, line_filter, max_error_rows, top)
+    except Exception as e:
+        return {"path": path, "error": f"{type(e).__name__}: {e}"}
+
+
+def run(args):
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    files = failed = 0
+    workers = args.workers or os.cpu_count() or 1
+
+    def write(future):
+        nonlocal files, failed
+        summary = future.result()
+        files += 1
+        if "error" in summary:
+            failed += 1
+            print(f"{summary['path']}: {summary['error']}", file=sys.stderr)
+        elif args.verbose:
+            print(f"{summary['path']}: {summary['rows']} rows, {summary['errors']} errors, "
+                  f"{summary['parse_seconds']} s", file=sys.stderr)
+        output.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        output.flush()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            running = set()
+            for path in find_logs(args.paths, args.patterns):
+                if len(running) >= workers * QUEUED_PER_WORKER:
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        write(future)
+                running.add(executor.submit(summarize, path, args.activity, args.errors, args.max_errors, args.top))
+            for future in wait(running).done:
+                write(future)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"{files} files, {failed} failed, {round(time.perf_counter() - start, 2)} s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize directories of ElectroNeek logs without the UI.")
+    parser.add_argument("paths", nargs="+", help="directories to scan, or log files")
+    parser.add_argument("--patterns", nargs="+", default=list(PATTERNS), help="file name patterns of the logs")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, one per CPU by default")
+    parser.add_argument("--output", help="write the JSONL summaries to this file instead of stdout")
+    parser.add_argument("--activity", default="", help="only keep entries whose activity contains this text")
+    parser.add_argument("--errors", choices=("Any", "Yes", "No"), default="Any", help="only keep error entries, or none")
+    parser.add_argument("--max-errors", type=int, default=100, help="error rows listed per file")
+    parser.add_argument("--top", type=int, default=10, help="error clusters and activities listed per file")
+    parser.add_argument("--verbose", action="store_true", help="report every file on stderr")
+    sys.exit(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Benchmarks for the log parser.
+
+Generates a synthetic robot_autolog_*.log file and measures parse throughput,
+peak memory, time to first row, filter latency and Treeview population time
+for each loading mode. Results are written as JSON so runs of different
+versions can be compared.
+
+    python benchmark.py --size-mb 200 --output results.json
+
+Each mode runs in its own process so peak memory is measured per mode. The
+Treeview is measured on a real Tk window when a display is available, and
+with the Tk widget stubbed out otherwise.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import logengine
+
+MODES = ("serial", "memory_mapped", "parallel", "parallel_memory_mapped", "cached")
+FILTERS = [("log", "Any"), ("", "Yes"), ("click", "No"), ("subprogram", "Yes")]
+
+
+def load_activity_names():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "output.json"), "r") as file:
+        return list(json.load(file).get("activities", {}))
+
+
+def system_config_line(timestamp):
+    """
+    A system config entry shaped like the one extract_system_config reads.
+    """
+    config = {
+        "windows": {"version": "10.0.19045"},
+        "cpu": {"name": "Intel(R) Core(TM) i7-10750H CPU @ 2.60GHz", "number_of_cores": 6},
+        "mem": {"capacity": 16 * 1024 ** 3},
+        "hdd": [{"interface_type": "SCSI", "size": 512 * 1024 ** 3, "status": "OK"}],
+        "computer": {"manufacturer": "Dell Inc.", "model": "Latitude 5510"},
+    }
+    return f"{timestamp.isoformat()} {json.dumps(config)}\n"
+
+
+def generate_log(path, size_mb=50, error_ratio=0.05, payload_bytes=200, seed=0):
+    """
+    Write a synthetic autolog of about size_mb megabytes and return its number of entries.
+    Activities are drawn from output.json, error_ratio of the entries fail
+    and output results carry about payload_bytes of data.
+    """
+    rng = random.Random(seed)
+    activities = load_activity_names()
+    timestamp = datetime(2024, 1, 1, 8, 0, 0)
+    target = size_mb * 1024 * 1024
+    written = 0
+    entries = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as file:
+        line = system_config_line(timestamp)
+        file.write(line)
+        written += len(line)
+        while written < target:
+            timestamp += timedelta(milliseconds=rng.randint(1, 2000))
+            activity = rng.choice(activities)
+            failed = rng.random() < error_ratio
+            entry = {
+                "activity_name": activity,
+                "status": "error" if failed else "success",
+                "executed_branch": rng.choice(["then", "else"]) if activity in ("If... then", "Do-while loop") else "N/A",
+                "output_result": "x" * rng.randint(0, payload_bytes * 2),
+                "error_message": f"Element not found after {rng.randint(1, 60)} seconds" if failed else "",
+            }
+            if activity == "Subprogram":
+                entry["fileName"] = f"subprogram_{rng.randint(1, 20)}.neek"
+            line = f"{timestamp.isoformat(timespec='milliseconds')} {json.dumps(entry)}\n"
+            file.write(line)
+            written += len(line.encode("utf-8"))
+            entries += 1
+    return entries
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process in MB, or None where it can't be read.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class TimedStore(logengine.RecordStore):
+    """
+    RecordStore that remembers when its first row arrived.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.first_row_time = None
+
+    def append(self, line, log_data, offset=0):
+        if self.first_row_time is None:
+            self.first_row_time = time.perf_counter()
+        return super().append(line, log_data, offset)
+
+    def extend(self, other):
+        if self.first_row_time is None and len(other):
+            self.first_row_time = time.perf_counter()
+        super().extend(other)
+
+
+def load(path, mode, cache):
+    store = TimedStore()
+    if mode == "serial":
+        logengine.load_log_file(path, store)
+    elif mode == "memory_mapped":
+        logengine.index_log_file(path, store)
+    elif mode == "parallel":
+        logengine.parse_log_parallel(path, store)
+    elif mode == "parallel_memory_mapped":
+        logengine.parse_log_parallel(path, store, lazy=True)
+    elif mode == "cached":
+        cached_store = cache.load(path)
+        if cached_store is None:
+            raise RuntimeError("No cache entry, run the serial mode first")
+        store.extend(cached_store)
+        store.path = path
+    return store
+
+
+def measure_filters(store):
+    latencies = {}
+    for activity_filter, error_filter in FILTERS:
+        store.filter_cache.clear()
+        start = time.perf_counter()
+        rows = store.filter_rows(activity_filter, error_filter)
+        latencies[f"{activity_filter or '*'}/{error_filter}"] = {
+            "seconds": round(time.perf_counter() - start, 6), "rows": len(rows)}
+    return latencies
+
+
+class StubTreeview:
+    """
+    Stands in for ttk.Treeview when there is no display, keeping items in a dict.
+    """
+
+    def __init__(self):
+        self.items = {}
+
+    def get_children(self):
+        return tuple(self.items)
+
+    def insert(self, parent, index, iid=None, **options):
+        self.items[iid] = options
+        return iid
+
+    def item(self, iid, **options):
+        self.items[iid].update(options)
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.items[iid]
+
+    def selection_set(self, items):
+        pass
+
+
+def measure_treeview(store, pages=200, page_size=40):
+    """
+    Time the first render of the grid and paging through it with render_view.
+    """
+    import parsertool
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        root = None
+
+    if root is not None:
+        root.withdraw()
+        processor = parsertool.LogProcessor(root)
+        processor.store = store
+        processor.page_size = page_size
+        view = processor
+        backend = "tk"
+    else:
+        view = SimpleNamespace(store=store, view_rows=range(len(store)), view_top=0, page_size=page_size,
+                               visible_rows=[], selected_row_id=None, logs_tree=StubTreeview(),
+                               v_scrollbar=SimpleNamespace(set=lambda first, last: None))
+        backend = "stub"
+
+    start = time.perf_counter()
+    if root is not None:
+        processor.populate_treeview()
+        root.update_idletasks()
+    else:
+        parsertool.LogProcessor.render_view(view)
+    first_render = time.perf_counter() - start
+
+    step = max(1, len(store) // pages)
+    start = time.perf_counter()
+    for page in range(pages):
+        view.view_top = page * step
+        parsertool.LogProcessor.render_view(view)
+        if root is not None:
+            root.update_idletasks()
+    page_seconds = (time.perf_counter() - start) / pages
+
+    if root is not None:
+        root.destroy()
+    return {"backend": backend, "first_render_seconds": round(first_render, 6),
+            "seconds_per_page": round(page_seconds, 6)}
+
+
+def measure(path, mode, cache_dir, treeview):
+    """
+    Load path in one mode and return its measurements. Runs in a child process.
+    """
+    cache = logengine.ParseCache(cache_dir)
+    size = os.path.getsize(path)
+    start = time.perf_counter()
+    store = load(path, mode, cache)
+    elapsed = time.perf_counter() - start
+    if mode == "serial":
+        cache.save(path, store, logengine.file_fingerprint(path))
+    result = {
+        "mode": mode,
+        "rows": len(store),
+        "parse_seconds": round(elapsed, 4),
+        "mb_per_second": round(size / (1024 * 1024) / elapsed, 2) if elapsed else None,
+        "time_to_first_row": round(store.first_row_time - start, 4) if store.first_row_time else None,
+        "filters": measure_filters(store),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if treeview:
+        result["treeview"] = measure_treeview(store)
+    store.close()
+    return result
+
+
+def run(args):
+    # The generated log and the parse cache are removed once the modes have run
+    with tempfile.TemporaryDirectory(prefix="parserlog_bench_") as work_dir:
+        report = run_modes(args, work_dir)
+    output = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+def run_modes(args, work_dir):
+    """
+    Run every mode in its own process on the log (generated into work_dir unless --log was given) and return the report.
+    """
+    path = args.log or os.path.join(work_dir, "robot_autolog_benchmark.log")
+    generated = None
+    if not args.log:
+        start = time.perf_counter()
+        entries = generate_log(path, args.size_mb, args.error_ratio, args.payload_bytes, args.seed)
+        generated = {"entries": entries, "seconds": round(time.perf_counter() - start, 2)}
+
+    results = []
+    for mode in args.modes:
+        command = [sys.executable, os.path.abspath(__file__), "--measure", mode, "--log", path,
+                   "--cache-dir", os.path.join(work_dir, "cache")]
+        if args.treeview:
+            command.append("--treeview")
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            results.append({"mode": mode, "error": completed.stderr.strip().splitlines()[-1:]})
+            continue
+        results.append(json.loads(completed.stdout))
+        print(f"{mode}: {results[-1]['parse_seconds']} s, {results[-1]['mb_per_second']} MB/s, "
+              f"peak {results[-1]['peak_rss_mb']} MB", file=sys.stderr)
+
+    return {
+        "label": args.label,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "log": {"path": path, "bytes": os.path.getsize(path), "generated": generated,
+                "error_ratio": args.error_ratio, "payload_bytes": args.payload_bytes},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ElectroNeek log parser.")
+    parser.add_argument("--size-mb", type=int, default=50, help="size of the generated log")
+    parser.add_argument("--error-ratio", type=float, default=0.05, help="share of entries with status error")
+    parser.add_argument("--payload-bytes", type=int, default=200, help="average size of output results")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log", help="benchmark an existing log instead of generating one")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--treeview", action="store_true", help="also time Treeview population")
+    parser.add_argument("--label", default="", help="free text stored with the results, e.g. a version")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--measure", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.log, args.measure, args.cache_dir, args.treeview)))
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
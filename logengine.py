@@ -0,0 +1,2612 @@
+"""
+Parsing engine for ElectroNeek automatic logs.
+
+Nothing in here touches Tkinter, so the same code can be driven by the UI in
+parsertool.py or used on its own.
+"""
+import bz2
+import gzip
+import hashlib
+import heapq
+import io
+import json
+import logging
+import lzma
+import math
+import mmap
+import os
+import re
+import sqlite3
+import time
+import zipfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor, wait
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from itertools import compress, islice
+from operator import itemgetter, le, sub
+
+READ_SIZE = 64 * 1024  # Bytes read from disk per call
+
+CACHE_DIR = os.path.join(os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache'),
+                         'ParserLog')
+CACHE_MAX_BYTES = 1024 ** 3  # Total size of the parse cache before old entries are evicted
+CACHE_MAGIC = b'PLCACHE1'
+DATABASE_DIR = os.path.join(CACHE_DIR, 'databases')  # SQLite databases of logs loaded in SQLite mode
+FINGERPRINT_BYTES = 64 * 1024  # Bytes hashed at the head and tail of a log file
+PARALLEL_RANGE_BYTES = 16 * 1024 * 1024  # Smallest byte range handed to a parse worker
+COMPRESSED_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}  # Decompressors by file extension
+ZIP_MEMBER_SEPARATOR = '::'  # Joins an archive path and a member name into the path of a zipped log
+SEARCH_CHUNK_ROWS = 1024  # Rows checked between two results of iter_search
+HISTOGRAM_WIDTHS = (1, 2, 5, 10, 30, 60, 2 * 60, 5 * 60, 10 * 60, 30 * 60, 3600, 3 * 3600, 6 * 3600, 12 * 3600,
+                    86400, 7 * 86400)  # Seconds per bucket of the timeline histogram levels
+HISTOGRAM_MAX_BUCKETS = 10000  # Buckets of the finest timeline histogram level
+ANALYTICS_SLOWEST = 5  # Slowest rows listed per activity
+CALL_SUBPROGRAM, CALL_LOOP, CALL_ITERATION = range(3)  # Kinds of call tree nodes
+SUBPROGRAM_EXIT_WORDS = {'end', 'exit', 'finish', 'return'}  # Words of activity names leaving a subprogram
+LOOP_EXIT_BRANCHES = ('else', 'false', 'no')  # Executed branches of a loop entry that leaves the loop
+GRID_VALUE_CHARS = 500  # Characters of a grid cell before the value is cut and its size shown
+PRETTY_CHUNK_CHARS = 64 * 1024  # Characters per chunk of iter_pretty_json
+PARTIAL_WORD_CHARS = 3  # Shortest word start or end looked up in the vocabulary of a text index
+PREVIEW_SAMPLES = 4000  # Lines decoded by sample_log
+PREVIEW_SECONDS = 1.0  # Time budget of sample_log
+PREVIEW_HEAD_LINES = 10  # Lines sample_log reads from the start and end of a log
+
+# Fields the grid needs, decoded straight from the raw bytes in memory-mapped mode
+GRID_FIELDS = [(name, b'"' + name.encode() + b'"') for name in ('activity_name', 'status', 'executed_branch')]
+FIELD_VALUE_PATTERN = re.compile(rb'\s*:\s*"((?:[^"\\]|\\.)*)"')
+WORD_PATTERN = re.compile(r'\w+')  # Words of the text index
+ERROR_MESSAGE_KEY = '"error_message"'
+STRING_VALUE_PATTERN = re.compile(r'\s*:\s*"((?:[^"\\]|\\.)*)"')  # FIELD_VALUE_PATTERN for decoded lines
+# Variable parts of error messages, masked in this order so that error rows group into templates.
+# A pattern only runs on messages holding its hint, which skips most of them.
+ERROR_MASKS = [
+    ('://', re.compile(r'\b[a-zA-Z][\w+.-]*://\S+'), '<url>'),
+    ('@', re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+'), '<email>'),
+    ('\\', re.compile(r'(?:\b[a-zA-Z]:|\\\\[\w.$-]+)\\[^\s"\'<>|]*'), '<path>'),
+    ('/', re.compile(r'(?<![\w.])/(?:[^\s/"\'<>|]+/)+[^\s/"\'<>|]*'), '<path>'),
+    ('-', re.compile(r'\b[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}\b'), '<uuid>'),
+    ('', re.compile(r'(?<!\w)(?:0x[0-9a-fA-F]+|[0-9a-fA-F]{12,})(?!\w)'), '<hex>'),
+    ('"', re.compile(r'"[^"]*"'), '<str>'),
+    ("'", re.compile(r"(?<!\w)'[^']*'(?!\w)"), '<str>'),
+    ('', re.compile(r'\d+(?:\.\d+)*'), '<num>'),
+]
+
+
+def split_member_path(path):
+    """
+    Split "archive.zip::member.log" into the archive and the member, (path, None) for other paths.
+    """
+    archive, separator, member = path.partition(ZIP_MEMBER_SEPARATOR)
+    return (archive, member) if separator else (path, None)
+
+
+def is_compressed(path):
+    """
+    True for logs that are read through a decompressor, and so can't be memory-mapped or followed.
+    """
+    archive, member = split_member_path(path)
+    return member is not None or os.path.splitext(archive)[1].lower() in COMPRESSED_OPENERS
+
+
+def expand_log_paths(paths):
+    """
+    Replace every zip archive in paths by member paths of the .log files it holds.
+    """
+    expanded = []
+    for path in paths:
+        if os.path.splitext(path)[1].lower() == '.zip' and ZIP_MEMBER_SEPARATOR not in path:
+            with zipfile.ZipFile(path) as archive:
+                expanded.extend(path + ZIP_MEMBER_SEPARATOR + info.filename for info in archive.infolist()
+                                if not info.is_dir() and info.filename.lower().endswith('.log'))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def log_size(path):
+    """
+    Bytes of a log as stored on disk, compressed for compressed logs.
+    """
+    archive, member = split_member_path(path)
+    if member is None:
+        return os.path.getsize(archive)
+    with zipfile.ZipFile(archive) as zip_file:
+        return zip_file.getinfo(member).compress_size
+
+
+class LogReader:
+    """
+    Binary stream of a log file, decompressing .gz, .bz2 and .xz files and zip members on the fly.
+    position() is how many bytes of size, the log as stored on disk, have
+    been consumed, so progress is reported against the compressed bytes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        archive, member = split_member_path(path)
+        self.archive = None
+        self.raw = None
+        self.scale = None
+        if member is not None:
+            self.archive = zipfile.ZipFile(archive)
+            info = self.archive.getinfo(member)
+            self.stream = self.archive.open(info)
+            self.size = info.compress_size
+            # Zip members only tell their uncompressed position
+            self.scale = info.compress_size / info.file_size if info.file_size else 1
+        else:
+            self.size = os.path.getsize(archive)
+            opener = COMPRESSED_OPENERS.get(os.path.splitext(archive)[1].lower())
+            if opener is None:
+                self.stream = io.FileIO(archive, 'r')
+            else:
+                self.raw = open(archive, 'rb')
+                self.stream = opener(self.raw)
+
+    def position(self):
+        if self.raw is not None:
+            return self.raw.tell()
+        if self.scale is not None:
+            return int(self.stream.tell() * self.scale)
+        return self.stream.tell()
+
+    def close(self):
+        self.stream.close()
+        if self.raw is not None:
+            self.raw.close()
+        if self.archive is not None:
+            self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_line_bytes(file, offset=0, read_size=READ_SIZE, partial=True, stats=None):
+    """
+    Yield (offset, line) for every line of a binary file object, without the newline.
+    offset is the position the file is read from, so the yielded offsets are
+    byte positions in the file. Lines cut by a read boundary are stitched back
+    together, and only the longest line is ever held in memory. With
+    partial=False a last line that has no newline yet is not yielded.
+    Reads and splits are timed per block into stats, if given.
+    """
+    pending = []  # Pieces of a line that has not seen its newline yet
+    while True:
+        if stats is not None:
+            clock = stats.clock()
+        chunk = file.read(read_size)
+        if stats is not None:
+            clock.lap("file read")
+        if not chunk:
+            break
+        if b'\n' not in chunk:
+            pending.append(chunk)
+            continue
+        lines = chunk.split(b'\n')
+        if pending:
+            pending.append(lines[0])
+            lines[0] = b''.join(pending)
+            pending = []
+        tail = lines.pop()
+        if tail:
+            pending.append(tail)
+        if stats is not None:
+            clock.lap("line split")
+        for line in lines:
+            yield offset, line
+            offset += len(line) + 1
+    if pending and partial:
+        yield offset, b''.join(pending)
+
+
+def split_log_line(line):
+    """
+    Split a raw log line into its timestamp and decoded JSON record.
+    Returns None for lines that do not have the expected format.
+    """
+    if " " not in line:
+        return None
+    timestamp, log_data_str = line.split(" ", 1)
+    try:
+        return timestamp, json.loads(log_data_str)
+    except json.JSONDecodeError:
+        logging.warning(f"Could not decode JSON: {log_data_str[:200]}")
+        return None
+
+
+def extract_system_config(timestamp, log_data):
+    """
+    Return the system configuration shown in the UI if log_data is the system config line, else None.
+    """
+    try:
+        if "windows" in log_data:
+            memory_in_bytes = log_data["mem"]["capacity"]
+            memory_in_gb = memory_in_bytes / (1024 ** 3)
+            all_hd_details = log_data["hdd"]
+            formatted_hd_list = [
+                f"Type: {hd['interface_type']}, Size: {hd['size'] / (1024 ** 3):.2f} GB, Status: {hd['status']}"
+                for hd in all_hd_details
+            ]
+            formatted_hd_details = '\n'.join(formatted_hd_list)
+            system_config = {
+                "Windows Version": log_data["windows"]["version"],
+                "CPU Name": log_data["cpu"]["name"],
+                "CPU Cores": log_data["cpu"]["number_of_cores"],
+                "Memory Ram": f"{memory_in_gb:.2f} GB",
+                "Hard Drive Details": formatted_hd_details,
+                "Computer Manufacturer": log_data["computer"]["manufacturer"],
+                "Computer Model": log_data["computer"]["model"]
+            }
+            return system_config
+    except (KeyError, TypeError):
+        return None
+
+
+def decode_grid_fields(line):
+    """
+    Decode the timestamp and the grid fields of a raw log line (bytes) without parsing all of its JSON.
+    Falls back to a full json.loads when a field name appears more than once
+    (it could belong to a nested object), when a value is not a plain string,
+    and for the system config line. Returns None for lines with the wrong format.
+    """
+    space = line.find(b' ')
+    if space == -1:
+        return None
+    if b'"windows"' in line:
+        return split_log_line(line.decode('utf-8', errors='replace'))
+    if line[space + 1:space + 2] != b'{' or not (line.endswith(b'}') or line.endswith(b'}\r')):
+        return None
+    log_data = {}
+    for name, key in GRID_FIELDS:
+        position = line.find(key, space)
+        if position == -1:
+            continue
+        position += len(key)
+        match = FIELD_VALUE_PATTERN.match(line, position)
+        if match is None or line.find(key, position) != -1:
+            return split_log_line(line.decode('utf-8', errors='replace'))
+        value = match.group(1)
+        if b'\\' in value:
+            log_data[name] = json.loads(b'"' + value + b'"')
+        else:
+            log_data[name] = value.decode('utf-8', errors='replace')
+    return line[:space].decode('utf-8', errors='replace'), log_data
+
+
+class LoadCancelled(Exception):
+    """
+    Raised by a loader when its cancel event was set, the store is then incomplete.
+    """
+
+
+def load_log_file(path, store, on_progress=None, line_filter=None, cancel=None):
+    """
+    Stream a log file into store one line at a time, keeping each row's text in memory.
+    on_progress(position, size) is called whenever another block has been
+    read, and LoadCancelled is raised there once the cancel event is set.
+    With a line_filter only matching entries are kept. Returns the system
+    config, if any. Every stage is timed into store.stats for the lines it
+    samples.
+    """
+    system_config = None
+    store.path = path
+    stats = store.stats
+    sample_every = stats.sample_every
+    processed_size = 0
+    lines = 0
+    with LogReader(path) as reader:
+        size = reader.size
+        for offset, line_bytes in iter_line_bytes(reader.stream, stats=stats):
+            if reader.position() != processed_size:
+                processed_size = reader.position()
+                if cancel is not None and cancel.is_set():
+                    raise LoadCancelled(path)
+                if on_progress is not None:
+                    on_progress(processed_size, size)
+            lines += 1
+            timed = sample_every and lines % sample_every == 0
+            if timed:
+                clock = stats.clock(sample_every)
+            if line_filter is not None and not line_filter.accepts_line(line_bytes):
+                continue
+            line = line_bytes.decode('utf-8', errors='replace')
+            if timed:
+                clock.lap("decode")
+            if " " not in line:
+                continue
+            timestamp, log_data_str = line.split(" ", 1)
+            if timed:
+                clock.lap("split timestamp")
+            try:
+                log_data = json.loads(log_data_str)
+            except json.JSONDecodeError:
+                logging.warning(f"Could not decode JSON: {log_data_str[:200]}")
+                continue
+            if timed:
+                clock.lap("json.loads")
+            config = extract_system_config(timestamp, log_data)
+            if timed:
+                clock.lap("extract_system_config")
+            if config:
+                system_config = config
+            elif line_filter is None or line_filter.accepts(log_data):
+                log_data["timestamp"] = timestamp
+                store.append(line, log_data, offset)
+                if timed:
+                    clock.lap("process_parsed_data")
+        store.end_offset = reader.stream.tell()
+    stats.count("lines", lines)
+    store.system_config = system_config
+    return system_config
+
+
+def machine_name(system_config):
+    """
+    Label of the machine a log was written on, from its system config.
+    """
+    if not system_config:
+        return "Unknown machine"
+    return f"{system_config['Computer Manufacturer']} {system_config['Computer Model']}"
+
+
+def merge_log_files(paths, store, on_progress=None, line_filter=None, cancel=None, keep_lines=True):
+    """
+    Merge several log files (rotated parts of a run, or runs on several machines) into store as one timeline.
+    The files are read side by side and combined with a streaming k-way
+    merge on their timestamps (heapq.merge), so besides the store only one
+    pending entry per file is held. Every row is tagged with its source
+    file and the machine named by that file's system config. Entries with
+    the same timestamp keep the order of paths, and entries without a
+    readable timestamp stay behind the entry before them in their file.
+    Rows keep their text with keep_lines or when a file is compressed, and
+    are read back from their file otherwise. on_progress(position, size) and cancel work on the bytes of
+    all files as in load_log_file. Returns the first system config found.
+    """
+    total = sum(log_size(path) for path in paths)
+    positions = [0] * len(paths)
+    configs = [None] * len(paths)
+    # Compressed logs can't be read back by offset
+    keep_lines = keep_lines or any(is_compressed(path) for path in paths)
+
+    def read_entries(index):
+        path = paths[index]
+        last_time = float('-inf')
+        with LogReader(path) as reader:
+            for offset, line_bytes in iter_line_bytes(reader.stream):
+                if reader.position() != positions[index]:
+                    positions[index] = reader.position()
+                    if cancel is not None and cancel.is_set():
+                        raise LoadCancelled(path)
+                    if on_progress is not None:
+                        on_progress(sum(positions), total)
+                if line_filter is not None and not line_filter.accepts_line(line_bytes):
+                    continue
+                line = line_bytes.decode('utf-8', errors='replace')
+                parsed = split_log_line(line)
+                if parsed is None:
+                    continue
+                timestamp, log_data = parsed
+                config = extract_system_config(timestamp, log_data)
+                if config:
+                    if configs[index] is None:
+                        configs[index] = config
+                    continue
+                if line_filter is not None and not line_filter.accepts(log_data):
+                    continue
+                log_data["timestamp"] = timestamp
+                time_key = parse_timestamp(timestamp)
+                if math.isnan(time_key):
+                    time_key = last_time
+                last_time = time_key
+                yield time_key, line if keep_lines else None, log_data, offset, index
+
+    store.path = None
+    for time_key, line, log_data, offset, index in heapq.merge(
+            *(read_entries(index) for index in range(len(paths))), key=itemgetter(0)):
+        store.append(line, log_data, offset, (paths[index], machine_name(configs[index])))
+    store.system_config = next((config for config in configs if config), None)
+    return store.system_config
+
+
+class LineFilter:
+    """
+    Grid filters pushed down into loading, so lines that can't match are never decoded.
+    accepts_line is a cheap test on the raw bytes that only rules out lines
+    that certainly don't match; accepts is the exact test on the decoded entry.
+    """
+
+    def __init__(self, activity_filter='', error_filter='Any'):
+        self.activity_filter = activity_filter.casefold()
+        self.error_filter = error_filter
+        # JSON only escapes these ASCII characters, any other ASCII needle appears verbatim in the line
+        needle = activity_filter.lower()
+        if needle.isascii() and not any(char in needle for char in '"\\/'):
+            self.activity_bytes = needle.encode('ascii')
+        else:
+            self.activity_bytes = None
+
+    def accepts_line(self, line):
+        if b'"windows"' in line:
+            return True  # The system config line is always needed
+        if self.error_filter == "Yes" and b'"error"' not in line:
+            return False
+        # Non-ASCII text (raw or \u-escaped) could case-fold into a match, leave it to the exact test
+        if (self.activity_bytes and line.isascii() and b'\\u' not in line
+                and self.activity_bytes not in line.lower()):
+            return False
+        return True
+
+    def accepts(self, log_data):
+        if self.activity_filter and self.activity_filter not in str(log_data.get('activity_name', 'N/A')).casefold():
+            return False
+        if self.error_filter != "Any":
+            return (log_data.get('status') == "error") == (self.error_filter == "Yes")
+        return True
+
+
+def index_log_file(path, store, on_progress=None, progress_step=1024 * 1024, line_filter=None, cancel=None):
+    """
+    Fill store from a memory-mapped log file, keeping only line offsets and grid fields.
+    Full entries are decoded again from the mapping when they are asked for,
+    so files bigger than memory can be opened. on_progress(position, size) is
+    called, and the cancel event checked, about every progress_step bytes.
+    With a line_filter only matching entries are kept. Returns the system
+    config, if any.
+    """
+    system_config = None
+    store.path = path
+    store.drop_text_index()  # Only the grid fields are decoded
+    stats = store.stats
+    sample_every = stats.sample_every
+    lines = 0
+    with open(path, 'rb') as file, stats.timed("index file"):
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return None
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            position = 0
+            next_report = progress_step
+            while position < size:
+                lines += 1
+                timed = sample_every and lines % sample_every == 0
+                if timed:
+                    clock = stats.clock(sample_every)
+                end = mapped.find(b'\n', position)
+                if end == -1:
+                    end = size
+                line = mapped[position:end]
+                if timed:
+                    clock.lap("find line")
+                if line_filter is None or line_filter.accepts_line(line):
+                    parsed = decode_grid_fields(line)
+                    if timed:
+                        clock.lap("decode grid fields")
+                    if parsed is not None:
+                        timestamp, log_data = parsed
+                        config = extract_system_config(timestamp, log_data)
+                        if config:
+                            system_config = config
+                        elif line_filter is None or line_filter.accepts(log_data):
+                            log_data["timestamp"] = timestamp
+                            store.append(None, log_data, position)
+                            if timed:
+                                clock.lap("process_parsed_data")
+                position = end + 1
+                if position >= next_report:
+                    if cancel is not None and cancel.is_set():
+                        raise LoadCancelled(path)
+                    if on_progress is not None:
+                        on_progress(min(position, size), size)
+                    next_report = position + progress_step
+    store.end_offset = size
+    stats.count("lines", lines)
+    store.system_config = system_config
+    return system_config
+
+
+def iter_sample_lines(mapped, size, samples):
+    """
+    Yield up to samples distinct lines of a memory-mapped log, spread evenly over its bytes.
+    Each byte offset is moved forward to the start of the next line, so long
+    lines are not favoured. Offsets follow the van der Corput sequence
+    (0, 1/2, 1/4, 3/4, 1/8, ...) of the file size, so any prefix of the
+    lines yielded covers the whole file.
+    """
+    seen = set()
+    for index in range(samples):
+        fraction, denominator = 0.0, 1.0
+        while index:
+            denominator *= 2
+            fraction += (index & 1) / denominator
+            index >>= 1
+        position = int(fraction * size)
+        start = 0
+        if position:
+            start = mapped.find(b'\n', position - 1) + 1
+            if start == 0 or start >= size:
+                continue  # Inside the last line
+        if start in seen:
+            continue
+        seen.add(start)
+        end = mapped.find(b'\n', start)
+        yield mapped[start:end if end != -1 else size]
+
+
+def last_timestamp(mapped, size, lines=PREVIEW_HEAD_LINES):
+    """
+    Epoch seconds of the last readable entry among the last lines of a memory-mapped log, or NaN.
+    """
+    end = size
+    for _ in range(lines):
+        while end and mapped[end - 1:end] in (b'\n', b'\r'):
+            end -= 1
+        if not end:
+            break
+        start = mapped.rfind(b'\n', 0, end) + 1
+        parsed = decode_grid_fields(mapped[start:end])
+        if parsed is not None and "windows" not in parsed[1]:
+            return parse_timestamp(parsed[0])
+        end = start
+    return math.nan
+
+
+def sample_log(path, samples=PREVIEW_SAMPLES, budget=PREVIEW_SECONDS):
+    """
+    Preview a log from a few thousand of its lines, without loading it.
+    Plain files are sampled with iter_sample_lines and compressed logs, which
+    can't be seeked into, from their first lines. Sampling stops after budget
+    seconds. Returns the system config from the first lines, the number of
+    rows sampled, the estimated number of rows of the file (None for a
+    compressed log that was not read to its end), the sampled rows per
+    activity, the error rate and the first and last entry times.
+    """
+    start = time.perf_counter()
+    system_config = None
+    first_time = last_time = math.nan
+    with LogReader(path) as reader:
+        # The same first lines validate_file_format reads
+        for _, line in islice(iter_line_bytes(reader.stream), PREVIEW_HEAD_LINES):
+            parsed = decode_grid_fields(line)
+            if parsed is None:
+                continue
+            config = extract_system_config(*parsed)
+            if config:
+                system_config = system_config or config
+            elif math.isnan(first_time):
+                first_time = parse_timestamp(parsed[0])
+
+    compressed = is_compressed(path)
+    activities = {}
+    sampled = errors = sampled_bytes = 0
+    times = []
+    complete = True  # Every planned sample was read
+    with ExitStack() as stack:
+        if compressed:
+            reader = stack.enter_context(LogReader(path))
+            size = None
+            lines = (line for _, line in islice(iter_line_bytes(reader.stream), samples))
+        else:
+            file = stack.enter_context(open(path, 'rb'))
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return None
+            mapped = stack.enter_context(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+            last_time = last_timestamp(mapped, size)
+            lines = iter_sample_lines(mapped, size, samples)
+        deadline = start + budget
+        read = 0
+        for line in lines:
+            read += 1
+            if time.perf_counter() > deadline:
+                complete = False
+                break
+            parsed = decode_grid_fields(line)
+            if parsed is None or "windows" in parsed[1]:
+                continue
+            timestamp, log_data = parsed
+            sampled += 1
+            sampled_bytes += len(line) + 1
+            activity = log_data.get('activity_name', 'N/A')
+            activities[activity] = activities.get(activity, 0) + 1
+            errors += log_data.get('status') == "error"
+            times.append(parse_timestamp(timestamp))
+
+    if size is not None:
+        estimated_rows = round(size * sampled / sampled_bytes) if sampled_bytes else 0
+    else:
+        # A compressed log that ran out before the samples did was read whole
+        estimated_rows = sampled if complete and read < samples else None
+    known_times = [value for value in (first_time, last_time, *times) if not math.isnan(value)]
+    return {
+        "path": path,
+        "bytes": log_size(path),
+        "system_config": system_config,
+        "sampled": sampled,
+        "complete": complete,
+        "estimated_rows": estimated_rows,
+        "activities": dict(sorted(activities.items(), key=itemgetter(1), reverse=True)),
+        "errors": errors,
+        "error_rate": errors / sampled if sampled else 0.0,
+        "start_time": min(known_times) if known_times else None,
+        "end_time": max(known_times) if known_times else None,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def parse_timestamp(timestamp):
+    """
+    Convert a log timestamp to seconds since the epoch, or NaN if it can't be read.
+    """
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except ValueError:
+        pass
+    try:
+        return float(timestamp)
+    except ValueError:
+        return math.nan
+
+
+class PerfStats:
+    """
+    Call counters and timers for the stages of loading and showing a log.
+    Per-line stages are only timed on one line in sample_every (0 turns them
+    off) and their totals are extrapolated from the sample, so the hot loops
+    stay cheap. Per-block and per-action stages are always timed.
+    """
+
+    def __init__(self, sample_every=0):
+        self.sample_every = sample_every
+        self.calls = {}
+        self.timed_calls = {}
+        self.seconds = {}
+
+    def count(self, stage, calls=1):
+        self.calls[stage] = self.calls.get(stage, 0) + calls
+
+    def add_time(self, stage, seconds, calls=1):
+        self.timed_calls[stage] = self.timed_calls.get(stage, 0) + calls
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def clock(self, weight=1):
+        return StageClock(self, weight)
+
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.count(stage)
+            self.add_time(stage, time.perf_counter() - start)
+
+    def merge(self, other):
+        for stage, calls in other.calls.items():
+            self.count(stage, calls)
+        for stage, seconds in other.seconds.items():
+            self.add_time(stage, seconds, other.timed_calls[stage])
+
+    def snapshot(self):
+        """
+        Stage totals as a JSON-serializable dict.
+        """
+        stages = {}
+        for stage in sorted(set(self.calls) | set(self.timed_calls)):
+            timed_calls = self.timed_calls.get(stage, 0)
+            seconds = self.seconds.get(stage, 0.0)
+            calls = max(self.calls.get(stage, 0), timed_calls)
+            stages[stage] = {
+                "calls": calls,
+                "timed_calls": timed_calls,
+                "seconds": round(seconds, 6),
+                "estimated_seconds": round(seconds * calls / timed_calls, 6) if timed_calls else None,
+            }
+        return {"sample_every": self.sample_every, "stages": stages}
+
+
+class StageClock:
+    """
+    Times consecutive stages of one piece of work: each lap() closes the current stage.
+    A sampled piece of work stands for weight calls of each of its stages.
+    """
+
+    def __init__(self, stats, weight=1):
+        self.stats = stats
+        self.weight = weight
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.stats.count(stage, self.weight)
+        self.stats.add_time(stage, now - self.last)
+        self.last = now
+
+
+class StringTable:
+    """
+    Interns repeated strings (activity names, statuses...) as small integer codes.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        if not isinstance(value, str):
+            value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class RecordStore:
+    """
+    Columnar store for parsed log entries, addressed by integer row id.
+    Activity names, statuses and executed branches are dictionary-encoded,
+    timestamps are kept in an array, and the full record is only decoded
+    again from the raw line when it is asked for.
+    Row id lists per activity and per status are kept up to date while rows
+    are appended, so filters never have to scan the store.
+    """
+
+    FILTER_CACHE_SIZE = 8
+    ROW_VALUES_CACHE_SIZE = 512  # Rows whose grid values are kept, a few pages of the grid
+
+    def __init__(self, index_text=True):
+        self.times = array('d')
+        self.activity_codes = array('I')
+        self.status_codes = array('I')
+        self.branch_codes = array('I')
+        self.activities = StringTable()
+        self.statuses = StringTable()
+        self.branches = StringTable()
+        self.offsets = array('Q')  # Byte offset of every row's line in the log file
+        self.lines = []  # Raw "<timestamp> <json>" text of every row, if kept in memory
+        self.path = None  # Log file the rows are re-read from when lines are not kept
+        self.mapped = None
+        # Only filled for rows merged from several log files
+        self.source_codes = array('I')  # Source file of every row
+        self.sources = StringTable()  # Paths of the source files
+        self.machines = []  # Machine named by the system config of every source file
+        self.source_maps = {}  # Memory maps of the source files, by source code
+        self.system_config = None
+        self.line_filter = None  # LineFilter the rows were loaded through, if any
+        self.end_offset = 0  # Byte offset the log file was read up to, following resumes there
+        self.stats = PerfStats()
+        # Filter indexes
+        self.activity_folded = []  # Case-folded name of every activity code
+        self.activity_rows = []  # Sorted row ids of every activity code
+        self.status_rows = []  # Sorted row ids of every status code
+        self.filter_cache = OrderedDict()
+        self.row_values_cache = OrderedDict()
+        # Words of the output results and error messages, built by the first search (see iter_search).
+        # index_text is False when some rows were loaded without their text
+        self.index_text = index_text
+        self.text_index = None
+        # Time indexes
+        self.times_checked = 0  # Rows checked to be in time order
+        self.times_ordered = True
+        self.time_sorted = None  # (rows, sorted times, row ids) once rows are out of time order
+        self.error_time_sorted = None  # (rows, sorted times, row ids) of the error rows, likewise
+        self.histogram = None
+        self.run_analytics = None
+        self.calls = None
+
+    def __len__(self):
+        return len(self.times)
+
+    def drop_text_index(self):
+        """
+        Never index text, for loaders that don't decode the whole entry.
+        """
+        self.index_text = False
+        self.text_index = None
+
+    def append(self, line, log_data, offset=0, source=None):
+        """
+        Add a parsed entry and return its row id.
+        source is a (path, machine) pair tagging rows merged from several files.
+        """
+        row = len(self.times)
+        if source is not None:
+            source_code = self.sources.code(source[0])
+            if source_code == len(self.machines):
+                self.machines.append(source[1])
+            self.source_codes.append(source_code)
+        activity_code = self.activities.code(log_data.get('activity_name', 'N/A'))
+        status_code = self.statuses.code(log_data.get('status', 'N/A'))
+        self.times.append(parse_timestamp(log_data.get('timestamp', '')))
+        self.activity_codes.append(activity_code)
+        self.status_codes.append(status_code)
+        self.branch_codes.append(self.branches.code(log_data.get('executed_branch', 'N/A')))
+        self.offsets.append(offset)
+        if line is not None:
+            self.lines.append(line)
+
+        if activity_code == len(self.activity_rows):
+            self.activity_folded.append(self.activities.values[activity_code].casefold())
+            self.activity_rows.append(array('I'))
+        self.activity_rows[activity_code].append(row)
+        if status_code == len(self.status_rows):
+            self.status_rows.append(array('I'))
+        self.status_rows[status_code].append(row)
+        return row
+
+    def extend(self, other):
+        """
+        Append all rows of another store, re-encoding its codes into this store's tables.
+        """
+        base = len(self)
+        activity_map = [self.activities.code(value) for value in other.activities.values]
+        status_map = [self.statuses.code(value) for value in other.statuses.values]
+        branch_map = [self.branches.code(value) for value in other.branches.values]
+        self.times.extend(other.times)
+        self.offsets.extend(other.offsets)
+        self.end_offset = max(self.end_offset, other.end_offset)
+        self.activity_codes.extend(remap_codes(other.activity_codes, activity_map))
+        self.status_codes.extend(remap_codes(other.status_codes, status_map))
+        self.branch_codes.extend(remap_codes(other.branch_codes, branch_map))
+        self.lines.extend(other.lines)
+        if len(other.source_codes):
+            source_map = []
+            for path, machine in zip(other.sources.values, other.machines):
+                source_map.append(self.sources.code(path))
+                if source_map[-1] == len(self.machines):
+                    self.machines.append(machine)
+            self.source_codes.extend(remap_codes(other.source_codes, source_map))
+
+        while len(self.activity_rows) < len(self.activities):
+            self.activity_folded.append(self.activities.values[len(self.activity_rows)].casefold())
+            self.activity_rows.append(array('I'))
+        while len(self.status_rows) < len(self.statuses):
+            self.status_rows.append(array('I'))
+        for code, rows in enumerate(other.activity_rows):
+            self.activity_rows[activity_map[code]].extend(shift_rows(rows, base))
+        for code, rows in enumerate(other.status_rows):
+            self.status_rows[status_map[code]].extend(shift_rows(rows, base))
+        if not other.index_text:
+            self.drop_text_index()
+        if self.system_config is None:
+            self.system_config = other.system_config
+        self.stats.merge(other.stats)
+
+    def line(self, row):
+        """
+        Raw text of a row, read back from the log file if it is not kept in memory.
+        """
+        if row < len(self.lines):
+            return self.lines[row]
+        start = self.offsets[row]
+        source = self.source_codes[row] if len(self.source_codes) else None
+        mapped = self.mapping(source)
+        end = mapped.find(b'\n', start)
+        if end == -1:
+            # The row may have been appended after the file was mapped
+            mapped = self.mapping(source, remap=True)
+            end = mapped.find(b'\n', start)
+            if end == -1:
+                end = len(mapped)
+        return mapped[start:end].decode('utf-8', errors='replace')
+
+    def mapping(self, source=None, remap=False):
+        """
+        Memory map of the log file, or of one source file of merged rows.
+        """
+        if source is None:
+            if remap or self.mapped is None:
+                self.map_file()
+            return self.mapped
+        mapped = self.source_maps.get(source)
+        if mapped is None or remap:
+            if mapped is not None:
+                mapped.close()
+            with open(self.sources.values[source], 'rb') as file:
+                mapped = self.source_maps[source] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapped
+
+    def map_file(self):
+        self.close()
+        with open(self.path, 'rb') as file:
+            self.mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+        for mapped in self.source_maps.values():
+            mapped.close()
+        self.source_maps.clear()
+
+    def timestamp(self, row):
+        return self.line(row).split(" ", 1)[0]
+
+    def activity(self, row):
+        return self.activities.values[self.activity_codes[row]]
+
+    def status(self, row):
+        return self.statuses.values[self.status_codes[row]]
+
+    def is_error(self, row):
+        return self.status(row) == "error"
+
+    def record(self, row):
+        """
+        Decode the full log entry of a row, including its timestamp.
+        """
+        timestamp, log_data = split_log_line(self.line(row))
+        log_data["timestamp"] = timestamp
+        if len(self.source_codes):
+            log_data["source_file"], log_data["machine"] = self.source(row)
+        return log_data
+
+    def source(self, row):
+        """
+        (path, machine) of the file a merged row came from, None for rows of a single file.
+        """
+        if not len(self.source_codes):
+            return None
+        source_code = self.source_codes[row]
+        return self.sources.values[source_code], self.machines[source_code]
+
+    def row_values(self, row):
+        """
+        Values shown in the logs grid for a row, in column order, long values cut by preview_value.
+        They are cached, since every scroll step of the grid asks again for
+        the rows still on screen and a large payload is slow to decode and cut.
+        """
+        values = self.row_values_cache.get(row)
+        if values is not None:
+            self.row_values_cache.move_to_end(row)
+            return values
+        log_data = self.record(row)
+        values = (log_data["timestamp"],
+                  self.activity(row),
+                  self.status(row),
+                  self.branches.values[self.branch_codes[row]],
+                  preview_value(log_data.get('output_result', 'N/A')),
+                  preview_value(log_data.get('error_message', 'N/A')))
+        self.row_values_cache[row] = values
+        if len(self.row_values_cache) > self.ROW_VALUES_CACHE_SIZE:
+            self.row_values_cache.popitem(last=False)
+        return values
+
+    def activity_matches(self, activity_filter, start=0):
+        """
+        Row ids from start on of the activities whose name contains activity_filter, ignoring case.
+        """
+        activity_filter = activity_filter.casefold()
+        # Only the distinct names are compared, never the rows
+        return union_rows([rows_from(self.activity_rows[code], start)
+                           for code, name in enumerate(self.activity_folded) if activity_filter in name])
+
+    def error_matches(self, is_error, start=0):
+        """
+        Row ids from start on whose status is (or is not) "error".
+        """
+        return union_rows([rows_from(self.status_rows[code], start)
+                           for code, status in enumerate(self.statuses.values) if (status == "error") == is_error])
+
+    def error_lines(self, rows=None):
+        """
+        (row id, activity, raw line) of every error row, limited to the sorted row ids rows if given.
+        """
+        errors = self.error_matches(True)
+        if rows is not None:
+            errors = intersect_rows([errors, rows])
+        activities = self.activities.values
+        return ((row, activities[self.activity_codes[row]], self.line(row)) for row in errors)
+
+    def error_messages(self, rows=None):
+        """
+        (row id, activity, error message) of every error row, limited to the sorted row ids rows if given.
+        """
+        return ((row, activity, error_message(line)) for row, activity, line in self.error_lines(rows))
+
+    def filter_rows(self, activity_filter='', error_filter='Any', start=0, time_range=None):
+        """
+        Row ids matching the grid filters, in row order.
+        activity_filter is a substring of the activity name, error_filter
+        is one of "Any", "Yes" or "No" and time_range a (start, end) pair
+        of epoch seconds. Each criterion is answered from the indexes and
+        the results are intersected. Only rows from start on are returned,
+        which lets a view be extended with newly appended rows.
+        """
+        if not activity_filter and error_filter == "Any" and time_range is None:
+            return range(start, len(self))
+        key = (activity_filter, error_filter, start, len(self), time_range)
+        if key in self.filter_cache:
+            self.filter_cache.move_to_end(key)
+            return self.filter_cache[key]
+
+        row_sets = []
+        if activity_filter:
+            row_sets.append(self.activity_matches(activity_filter, start))
+        if error_filter != "Any":
+            row_sets.append(self.error_matches(error_filter == "Yes", start))
+        if time_range is not None:
+            row_sets.append(self.time_rows(*time_range, start))
+        with self.stats.timed("filter"):
+            rows = intersect_rows(row_sets)
+
+        self.filter_cache[key] = rows
+        if len(self.filter_cache) > self.FILTER_CACHE_SIZE:
+            self.filter_cache.popitem(last=False)
+        return rows
+
+    def time_order(self):
+        """
+        None while the rows are in time order, so times can be binary searched as they are.
+        Otherwise (times, rows): the readable timestamps sorted, and the row id of each.
+        The order is checked incrementally, only over the rows appended since the last call,
+        and once it is broken only those rows are sorted and merged into the sorted times.
+        """
+        count = len(self.times)
+        if self.times_ordered and self.times_checked < count:
+            tail = self.times[max(self.times_checked - 1, 0):]
+            # NaN compares false, so a row with an unreadable timestamp ends the order too
+            self.times_ordered = not math.isnan(tail[0]) and all(map(le, tail, tail[1:]))
+            self.times_checked = count
+        if self.times_ordered:
+            return None
+        if self.time_sorted is None or self.time_sorted[0] != count:
+            start = self.time_sorted[0] if self.time_sorted else 0
+            self.time_sorted = (count,) + self.sort_by_time(self.time_sorted, range(start, count))
+        return self.time_sorted[1:]
+
+    def sort_by_time(self, time_sorted, rows):
+        """
+        (sorted times, row ids) of the rows of time_sorted, a (rows, sorted times, row ids)
+        tuple or None, and of rows, ascending row ids past them.
+        Only rows are sorted, they are then merged into time_sorted. Rows with
+        an unreadable timestamp are left out.
+        """
+        times = self.times
+        if any(map(math.isnan, map(times.__getitem__, rows))):
+            rows = [row for row in rows if not math.isnan(times[row])]
+        new_rows = array('I', sorted(rows, key=times.__getitem__))
+        new_times = array('d', map(times.__getitem__, new_rows))
+        if time_sorted is None:
+            return new_times, new_rows
+        return merge_time_order(time_sorted[1], time_sorted[2], new_times, new_rows)
+
+    def time_rows(self, start_time, end_time, start=0):
+        """
+        Row ids from start on with a timestamp from start_time up to end_time (excluded), in row order.
+        """
+        order = self.time_order()
+        if order is None:
+            return range(max(start, bisect_left(self.times, start_time)), bisect_left(self.times, end_time))
+        times, rows = order
+        rows = rows[bisect_left(times, start_time):bisect_left(times, end_time)]
+        return rows_from(array('I', sorted(rows)), start)
+
+    def time_histogram(self):
+        """
+        TimeHistogram of all rows, rebuilt when rows were appended since the last one.
+        Out of time order, the sorted times of the error rows are kept and
+        extended like those of all rows.
+        """
+        if self.histogram is None or self.histogram.rows != len(self):
+            with self.stats.timed("histogram"):
+                order = self.time_order()
+                if order is None:
+                    times = self.times
+                    error_times = array('d', map(self.times.__getitem__, self.error_matches(True)))
+                else:
+                    times = order[0]
+                    start = self.error_time_sorted[0] if self.error_time_sorted else 0
+                    self.error_time_sorted = (len(self),) + self.sort_by_time(self.error_time_sorted,
+                                                                              self.error_matches(True, start))
+                    error_times = self.error_time_sorted[1]
+                self.histogram = TimeHistogram(times, error_times, len(self))
+        return self.histogram
+
+    def analytics(self):
+        if self.run_analytics is None:
+            self.run_analytics = RunAnalytics(self)
+        return self.run_analytics
+
+    def call_tree(self):
+        """
+        CallTree of all rows, rebuilt when rows were appended since the last one.
+        """
+        if self.calls is None or self.calls.rows != len(self):
+            with self.stats.timed("call tree"):
+                self.calls = CallTree(self)
+        return self.calls
+
+
+def remap_codes(codes, mapping):
+    """
+    Translate an array of string table codes through mapping (old code -> new code).
+    """
+    if mapping == list(range(len(mapping))):
+        return codes
+    return array('I', map(mapping.__getitem__, codes))
+
+
+def shift_rows(rows, base):
+    if not base:
+        return rows
+    return array('I', map(base.__add__, rows))
+
+
+def rows_from(rows, start):
+    """
+    A copy of the part of a sorted row id array from row id start on.
+    Always a copy, never the index itself, since the store keeps appending
+    to its indexes while a view built from them is being shown.
+    """
+    return rows[bisect_left(rows, start):] if start else rows[:]
+
+
+def union_rows(row_sets):
+    """
+    Merge sorted row id arrays into one sorted array, each row id once.
+    """
+    if not row_sets:
+        return array('I')
+    if len(row_sets) == 1:
+        return row_sets[0]
+    merged = set()
+    for rows in row_sets:
+        merged.update(rows)
+    return array('I', sorted(merged))
+
+
+def intersect_rows(row_sets):
+    """
+    Intersect sorted row id arrays, starting from the most selective one.
+    """
+    row_sets = sorted(row_sets, key=len)
+    result = row_sets[0]
+    for rows in row_sets[1:]:
+        if not result:
+            break
+        if len(result) * 32 < len(rows):
+            # Few candidates left: binary search them in the larger list
+            size = len(rows)
+            result = array('I', (row for row in result
+                                 if (index := bisect_left(rows, row)) < size and rows[index] == row))
+        else:
+            result = array('I', sorted(set(result).intersection(rows)))
+    return result
+
+
+class TimeHistogram:
+    """
+    Number of rows and of errors per time bucket, precomputed at several bucket widths.
+    A timeline can then be drawn at any zoom without looking at the rows.
+    Buckets start at multiples of their width, so they line up across levels.
+    """
+
+    def __init__(self, times, error_times, rows=0):
+        """
+        times and error_times are the sorted timestamps of all rows and of the error rows.
+        """
+        self.rows = rows  # Rows of the store this was built from
+        self.levels = []  # (width, start of the first bucket, row counts, error counts), finest first
+        self.start = times[0] if len(times) else None
+        self.end = times[-1] if len(times) else None
+        if self.start is None:
+            return
+        widths = iter(HISTOGRAM_WIDTHS)
+        width = next(widths)
+        while True:
+            first = math.floor(self.start / width) * width
+            buckets = int((self.end - first) // width) + 1
+            if buckets <= HISTOGRAM_MAX_BUCKETS:
+                edges = [first + width * bucket for bucket in range(buckets + 1)]
+                self.levels.append((width, first, bucket_counts(times, edges), bucket_counts(error_times, edges)))
+                if buckets == 1:
+                    break
+            width = next(widths, width * 2)  # Logs spanning years go on doubling the widest width
+
+    def level(self, start_time, end_time, max_buckets):
+        """
+        The finest level that shows start_time to end_time in at most max_buckets buckets.
+        """
+        for level in self.levels:
+            if (end_time - start_time) / level[0] <= max_buckets:
+                return level
+        return self.levels[-1] if self.levels else None
+
+
+def merge_time_order(times, rows, new_times, new_rows):
+    """
+    Merge new_times, sorted, and their row ids into times, sorted, and their row ids rows.
+    The new rows must come after all of rows, they then follow the rows
+    with the same time, as in a stable sort. Rows are copied a slice at a
+    time between the new ones, and new rows that are all later than times
+    are just appended to the arrays in place. Returns the merged (times, rows).
+    """
+    if not len(new_times):
+        return times, rows
+    if not len(times) or new_times[0] >= times[-1]:
+        times.extend(new_times)
+        rows.extend(new_rows)
+        return times, rows
+    merged_times = array('d')
+    merged_rows = array('I')
+    previous = 0
+    for time, row in zip(new_times, new_rows):
+        position = bisect_right(times, time, previous)
+        merged_times += times[previous:position]
+        merged_rows += rows[previous:position]
+        merged_times.append(time)
+        merged_rows.append(row)
+        previous = position
+    merged_times += times[previous:]
+    merged_rows += rows[previous:]
+    return merged_times, merged_rows
+
+
+def bucket_counts(times, edges):
+    """
+    Number of sorted times from each edge up to the next one.
+    """
+    positions = [bisect_left(times, edge) for edge in edges]
+    return array('I', map(sub, positions[1:], positions[:-1]))
+
+
+def summarize_activity(activity, rows, durations, errors):
+    """
+    Count, errors and durations of the rows of one activity.
+    durations holds the duration of every row in seconds, NaN where it is unknown.
+    """
+    timed = sorted(filter((0.0).__le__, durations))  # NaN and negative durations (clock changes) are left out
+    slowest = []
+    if timed:
+        threshold = timed[max(len(timed) - ANALYTICS_SLOWEST, 0)]
+        mask = list(map(threshold.__le__, durations))
+        slowest = sorted(zip(compress(durations, mask), compress(rows, mask)), reverse=True)[:ANALYTICS_SLOWEST]
+    total = math.fsum(timed)
+    return {
+        "activity": activity,
+        "count": len(rows),
+        "errors": errors,
+        "error_rate": errors / len(rows) if len(rows) else 0.0,
+        "total_seconds": total,
+        "mean_seconds": total / len(timed) if timed else None,
+        "p95_seconds": timed[math.ceil(0.95 * len(timed)) - 1] if timed else None,
+        "slowest": [(row, duration) for duration, row in slowest],  # Row ids, slowest first
+    }
+
+
+class RunAnalytics:
+    """
+    Per-activity counts, error rates and durations of the rows of a RecordStore.
+    An entry is written when its activity finishes, so its duration is the
+    time since the previous entry of the same log file. Durations are kept
+    in an array next to the store's columns, extended with the rows appended
+    since the last update, and the statistics are gathered per activity from
+    the store's row indexes. A store loaded through a line filter misses the
+    entries the filter dropped, so the time since its previous row is not
+    the time an activity took: its durations are all unknown.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.durations = array('d')  # Seconds since the previous entry of every row, NaN for the first
+        self.last_rows = {}  # Last row of every source file, for rows merged from several files
+
+    def update(self):
+        store = self.store
+        start = len(self.durations)
+        count = len(store)
+        if start == count:
+            return
+        times = store.times
+        if store.line_filter is not None:
+            self.durations.extend(array('d', [math.nan]) * (count - start))
+            return
+        if len(store.source_codes):
+            # Merged rows: the previous entry is the last one of the same source file
+            for row in range(start, count):
+                source = store.source_codes[row]
+                previous = self.last_rows.get(source)
+                self.durations.append(math.nan if previous is None else times[row] - times[previous])
+                self.last_rows[source] = row
+            return
+        if start == 0:
+            self.durations.append(math.nan)
+            start = 1
+        self.durations.extend(map(sub, times[start:count], times[start - 1:count - 1]))
+
+    def summary(self, rows=None):
+        """
+        Statistics per activity over rows (sorted row ids, all rows by default), most total time first.
+        """
+        self.update()
+        store = self.store
+        every_row = rows is None or (isinstance(rows, range) and rows.start == 0 and rows.stop >= len(store))
+        errors = store.error_matches(True)
+        if not every_row:
+            errors = intersect_rows([errors, rows])
+        result = []
+        with store.stats.timed("analytics"):
+            for code, activity_rows in enumerate(store.activity_rows):
+                if not every_row:
+                    activity_rows = intersect_rows([activity_rows, rows])
+                if not len(activity_rows):
+                    continue
+                durations = array('d', map(self.durations.__getitem__, activity_rows))
+                error_count = len(intersect_rows([activity_rows, errors])) if len(errors) else 0
+                result.append(summarize_activity(store.activities.values[code], activity_rows, durations, error_count))
+        result.sort(key=itemgetter("total_seconds"), reverse=True)
+        return result
+
+
+class SQLiteAnalytics:
+    """
+    RunAnalytics of a SQLiteStore. Durations come from a window function
+    over the whole table and the rows are grouped per activity in one pass.
+    Like RunAnalytics, a filtered load has no durations.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def summary(self, rows=None):
+        store = self.store
+        duration = "time - lag(time) OVER (PARTITION BY source ORDER BY id)" if store.line_filter is None else "NULL"
+        query = f"SELECT id, activity, status = 'error', {duration} FROM rows WHERE id < ?"
+        every_row = rows is None or (isinstance(rows, range) and rows.start == 0 and rows.stop >= len(store))
+        if not every_row:
+            # The durations need the rows left out of the view, so the view is joined after the window
+            store.connection.execute("CREATE TEMP TABLE IF NOT EXISTS view_rows (id INTEGER PRIMARY KEY)")
+            store.connection.execute("DELETE FROM view_rows")
+            store.connection.executemany("INSERT INTO view_rows VALUES (?)", ((row,) for row in rows))
+            query = f"SELECT timed.* FROM ({query}) AS timed JOIN view_rows USING (id)"
+        groups = {}
+        with store.stats.timed("analytics"):
+            for row, activity, is_error, duration in store.connection.execute(query, (len(store),)):
+                group = groups.get(activity)
+                if group is None:
+                    group = groups[activity] = [array('I'), array('d'), 0]
+                group[0].append(row)
+                group[1].append(math.nan if duration is None else duration)
+                group[2] += is_error
+            result = [summarize_activity(activity, *group) for activity, group in groups.items()]
+        result.sort(key=itemgetter("total_seconds"), reverse=True)
+        return result
+
+
+def call_kind(activity):
+    """
+    Part an activity plays in the call tree: "enter" or "exit" a subprogram, a "loop" check, or None for a plain step.
+    """
+    name = activity.casefold()
+    if 'subprogram' in name:
+        return 'exit' if SUBPROGRAM_EXIT_WORDS.intersection(WORD_PATTERN.findall(name)) else 'enter'
+    if 'loop' in name or 'while' in name or name.startswith('for each'):
+        return 'loop'
+    return None
+
+
+class CallTree:
+    """
+    Nesting of subprogram calls, loops and loop iterations, rebuilt from the flat rows of a RecordStore.
+    A subprogram entry opens a call and the steps logged after it, up to the
+    end of the call, are inside it. In a log that writes subprogram end
+    entries calls nest, and a call ends at its end entry, at a new call of
+    the same file (subprograms don't recurse) or at the end of the log.
+    Without end entries a return can't be seen, so calls never nest: a call
+    ends at the next subprogram entry, which becomes its sibling, or when
+    the loop it was called from checks its condition again.
+    A loop entry starts an iteration, unless its executed branch leaves the
+    loop. Only the subprogram and loop entries are visited,
+    found through the activity index; the rows between them are handed to
+    their node as whole runs. Logs merged from several files nest per file.
+    Nodes are kept in parallel arrays with parent pointers. What is directly
+    inside each node is one array per node, holding row ids and -1 - node
+    for nested nodes, so any level is listed without walking the rest of the
+    tree. Steps, errors and seconds of every node count all levels below it.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.rows = len(store)  # Rows of the store this was built from
+        self.kinds = array('B')
+        self.labels = []  # Subprogram file, loop activity or iteration number of every node
+        self.label_rows = array('I')  # Entry that opened every node
+        self.parents = array('i')  # Parent of every node, -1 at the top level
+        self.steps = array('I')
+        self.errors = array('I')
+        self.seconds = array('d')
+        self.children = [array('q')]  # Entries directly inside every node, the top level first
+        self.iterations = {}  # Number of iterations of every loop node
+        analytics = store.analytics()
+        analytics.update()
+        self.durations = analytics.durations
+        self.error_flags = bytearray(len(store))  # 1 for every error row
+        for row in store.error_matches(True):
+            self.error_flags[row] = 1
+        kinds = [call_kind(activity) for activity in store.activities.values]
+        entries = union_rows([store.activity_rows[code] for code, kind in enumerate(kinds) if kind])
+        if len(store.source_codes):
+            sources = [array('I') for _ in store.sources.values]
+            for row, source in enumerate(store.source_codes):
+                sources[source].append(row)
+            for rows in sources:
+                self.nest(rows, intersect_rows([entries, rows]), kinds)
+            label_rows = self.label_rows
+            self.children[0] = array('q', sorted(self.children[0],
+                                                 key=lambda entry: entry if entry >= 0 else label_rows[-1 - entry]))
+        else:
+            self.nest(range(len(store)), entries, kinds)
+        for node in reversed(range(len(self.kinds))):
+            parent = self.parents[node]
+            if parent >= 0:
+                self.steps[parent] += self.steps[node]
+                self.errors[parent] += self.errors[node]
+                self.seconds[parent] += self.seconds[node]
+
+    def nest(self, rows, entries, kinds):
+        """
+        Build the nodes of one log file. rows are its row ids, entries its subprogram and loop entries.
+        """
+        store = self.store
+        stack = []  # Open nodes, innermost last
+        position = 0
+        # Calls only nest in logs that write subprogram end entries
+        nested = any(kinds[store.activity_codes[row]] == 'exit' for row in entries)
+        for row in entries:
+            index = bisect_left(rows, row, position)
+            self.add(stack[-1] if stack else -1, rows[position:index])
+            position = index + 1
+            entry = rows[index:index + 1]
+            kind = kinds[store.activity_codes[row]]
+            if kind == 'enter':
+                name = store.record(row).get('fileName', '')
+                # The previous call of this file has returned, or without end entries the previous call
+                call = self.innermost(stack, CALL_SUBPROGRAM, name if nested else None)
+                if call is not None:
+                    del stack[stack.index(call):]
+                self.count(self.open(stack, CALL_SUBPROGRAM, name, row), entry)
+            elif kind == 'exit':
+                name = store.record(row).get('fileName', '')
+                call = self.innermost(stack, CALL_SUBPROGRAM, name)
+                if call is None:
+                    call = self.innermost(stack, CALL_SUBPROGRAM)
+                if call is None:
+                    self.add(stack[-1] if stack else -1, entry)  # An end without a call
+                else:
+                    self.add(call, entry)
+                    del stack[stack.index(call):]
+            else:
+                activity = store.activity(row)
+                loop = self.innermost(stack, CALL_LOOP, activity, within_call=nested)
+                if loop is None:
+                    loop = self.open(stack, CALL_LOOP, activity, row)
+                else:
+                    del stack[stack.index(loop) + 1:]  # The previous iteration is over
+                if store.branches.values[store.branch_codes[row]].casefold() in LOOP_EXIT_BRANCHES:
+                    self.add(loop, entry)
+                    stack.pop()
+                else:
+                    self.iterations[loop] = self.iterations.get(loop, 0) + 1
+                    self.count(self.open(stack, CALL_ITERATION, str(self.iterations[loop]), row), entry)
+        self.add(stack[-1] if stack else -1, rows[position:])
+
+    def innermost(self, stack, kind, label=None, within_call=True):
+        """
+        Innermost open node of kind (and label). With within_call a loop is
+        not looked for past the subprogram call it would be in.
+        """
+        for node in reversed(stack):
+            if self.kinds[node] == kind and (label is None or self.labels[node] == label):
+                return node
+            if within_call and kind == CALL_LOOP and self.kinds[node] == CALL_SUBPROGRAM:
+                return None
+        return None
+
+    def open(self, stack, kind, label, row):
+        node = len(self.kinds)
+        parent = stack[-1] if stack else -1
+        self.kinds.append(kind)
+        self.labels.append(label)
+        self.label_rows.append(row)
+        self.parents.append(parent)
+        self.steps.append(0)
+        self.errors.append(0)
+        self.seconds.append(0.0)
+        self.children.append(array('q'))
+        self.children[parent + 1].append(-1 - node)
+        stack.append(node)
+        return node
+
+    def add(self, node, rows):
+        """
+        Put a run of rows directly inside node.
+        """
+        if len(rows):
+            self.children[node + 1].extend(array('q', rows))
+            self.count(node, rows)
+
+    def count(self, node, rows):
+        if node < 0 or not len(rows):
+            return
+        self.steps[node] += len(rows)
+        if isinstance(rows, range):
+            self.seconds[node] += math.fsum(filter((0.0).__le__, self.durations[rows.start:rows.stop]))
+            self.errors[node] += self.error_flags.count(1, rows.start, rows.stop)
+        else:
+            self.seconds[node] += math.fsum(filter((0.0).__le__, map(self.durations.__getitem__, rows)))
+            self.errors[node] += sum(map(self.error_flags.__getitem__, rows))
+
+
+class BatchingStore(RecordStore):
+    """
+    Stands in for the store of a loader and hands the rows on in batches instead of keeping them.
+    on_batch(batch) gets a RecordStore of the next rows once batch_rows rows
+    were appended or batch_seconds passed since the previous batch, so the
+    first rows leave right away and a slow file still streams. Call flush()
+    when the loader is done to send the rest. Loaders that merge whole
+    stores (parse_log_parallel) pass each of them on as a batch.
+    """
+
+    def __init__(self, on_batch, batch_rows=5000, batch_seconds=0.05):
+        super().__init__()
+        self.on_batch = on_batch
+        self.batch_rows = batch_rows
+        self.batch_seconds = batch_seconds
+        self.rows = 0
+        self.batch = RecordStore()
+        self.last_batch = float('-inf')  # The first rows are handed on without waiting
+
+    def drop_text_index(self):
+        super().drop_text_index()
+        self.batch.drop_text_index()
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, line, log_data, offset=0, source=None):
+        self.batch.append(line, log_data, offset, source)
+        self.rows += 1
+        # The clock is only read every 256 rows to keep appends cheap
+        if len(self.batch) >= self.batch_rows or (
+                self.rows % 256 == 0 and time.perf_counter() - self.last_batch >= self.batch_seconds):
+            self.flush()
+        return self.rows - 1
+
+    def extend(self, other):
+        self.flush()
+        if self.system_config is None:
+            self.system_config = other.system_config
+        self.rows += len(other)
+        self.end_offset = max(self.end_offset, other.end_offset)
+        self.on_batch(other)
+        self.last_batch = time.perf_counter()
+
+    def flush(self):
+        if len(self.batch):
+            self.on_batch(self.batch)
+            self.batch = RecordStore(index_text=self.index_text)
+        self.last_batch = time.perf_counter()
+
+
+class SQLiteStore:
+    """
+    Rows of a log kept in a SQLite database file instead of memory, for the largest logs.
+    It offers the RecordStore methods the UI needs and pages rows from the
+    database on demand, so memory stays flat whatever the size of the log.
+    During a load one instance appends rows (batched executemany calls in
+    large transactions) and finishes the database, while another one reads
+    the rows committed so far. A finished database is reopened instantly as
+    long as its log files are unchanged.
+    """
+    INSERT_ROWS = 10000  # Rows per executemany
+    COMMIT_ROWS = 200000  # Rows per transaction
+    FILTER_CACHE_SIZE = 8
+    ROW_VALUES_CACHE_SIZE = 512
+
+    def __init__(self, database, on_commit=None):
+        self.database = database
+        self.connection = sqlite3.connect(database)
+        self.connection.execute("PRAGMA journal_mode=WAL")  # Lets the UI read while a load writes
+        self.on_commit = on_commit  # Called with the number of rows after every commit
+        self.pending = []
+        self.committed = 0
+        self.rows = 0
+        self.has_sources = False  # Rows merged from several files, read from the rows by refresh
+        self.refresh()
+        self.path = None
+        self.line_filter = None
+        self.lines = ()  # Rows are never kept in memory
+        self.index_text = False  # Searches scan the rows
+        self.text_index = None
+        self.system_config = self.meta("system_config")
+        self.stats = PerfStats()
+        self.filter_cache = OrderedDict()
+        self.row_values_cache = OrderedDict()  # As RecordStore.row_values
+        self.histogram = None
+
+    def analytics(self):
+        return SQLiteAnalytics(self)
+
+    def call_tree(self):
+        return None  # Rebuilding the nesting needs the activity index of a RecordStore
+
+    @staticmethod
+    def database_path(paths, line_filter=None, directory=DATABASE_DIR):
+        """
+        Database file of some log files. A filtered load gets its own file,
+        so it never replaces the database of the full load.
+        """
+        key = [os.path.abspath(path) for path in paths]
+        if line_filter is not None:
+            key.append(f"filter:{line_filter.activity_filter}:{line_filter.error_filter}")
+        name = hashlib.sha1('\n'.join(key).encode('utf-8')).hexdigest()
+        return os.path.join(directory, name + '.sqlite')
+
+    @staticmethod
+    def fingerprint(paths):
+        # A zipped log is identified by its archive
+        return [file_fingerprint(split_member_path(path)[0]) for path in paths]
+
+    @classmethod
+    def create(cls, database):
+        """
+        Start an empty database, replacing any previous one.
+        Raises OSError when the previous one can't be removed, such as while
+        another process still has it open on Windows.
+        """
+        os.makedirs(os.path.dirname(database), exist_ok=True)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(database + suffix):
+                os.remove(database + suffix)
+        store = cls(database)
+        store.connection.executescript("""
+            CREATE TABLE rows (id INTEGER PRIMARY KEY, time REAL, timestamp TEXT, activity TEXT,
+                               status TEXT, branch TEXT, source TEXT, machine TEXT, raw TEXT);
+            CREATE INDEX rows_time ON rows (time);
+            CREATE INDEX rows_activity ON rows (activity);
+            CREATE INDEX rows_status ON rows (status);
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        return store
+
+    @classmethod
+    def open_finished(cls, paths, directory=DATABASE_DIR):
+        """
+        Reopen the database of unchanged log files, or return None.
+        """
+        database = cls.database_path(paths, directory=directory)
+        if not os.path.exists(database):
+            return None
+        store = None
+        try:
+            store = cls(database)
+            if store.meta("fingerprint") == cls.fingerprint(paths):
+                return store
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"Could not reopen {database}: {e}")
+        if store is not None:
+            store.close()
+        return None
+
+    def meta(self, key):
+        try:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:
+            return None  # Not created yet
+        return json.loads(row[0]) if row else None
+
+    def refresh(self):
+        """
+        Catch up with the rows another instance has committed.
+        """
+        try:
+            self.rows = self.connection.execute("SELECT coalesce(max(id) + 1, 0) FROM rows").fetchone()[0]
+            if not self.has_sources and self.rows:
+                # A merge tags every row with its source, so the first row tells
+                self.has_sources = bool(self.connection.execute(
+                    "SELECT source IS NOT NULL FROM rows WHERE id = 0").fetchone()[0])
+        except sqlite3.OperationalError:
+            self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, line, log_data, offset=0, source=None):
+        if line is not None:
+            timestamp, raw = line.split(" ", 1)
+        else:
+            timestamp = log_data.get('timestamp', '')
+            raw = json.dumps({key: value for key, value in log_data.items() if key != 'timestamp'})
+        self.pending.append((self.rows, parse_timestamp(timestamp), timestamp,
+                             log_data.get('activity_name', 'N/A'), log_data.get('status', 'N/A'),
+                             log_data.get('executed_branch', 'N/A'),
+                             source[0] if source else None, source[1] if source else None, raw))
+        if source is not None:
+            self.has_sources = True
+        self.rows += 1
+        # A small first batch gets the first rows on screen quickly
+        if len(self.pending) >= (self.INSERT_ROWS if self.committed else 256):
+            self.flush()
+        return self.rows - 1
+
+    def flush(self, commit=False):
+        if self.pending:
+            self.connection.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self.pending)
+            self.pending = []
+        if commit or not self.committed or self.rows - self.committed >= self.COMMIT_ROWS:
+            self.connection.commit()
+            self.committed = self.rows
+            if self.on_commit is not None:
+                self.on_commit(self.rows)
+
+    def finish(self, system_config=None, fingerprint=None):
+        """
+        Write the last rows and what is needed to reopen the database.
+        Without a fingerprint (a filtered load) the database is not reopened later.
+        """
+        self.system_config = system_config
+        self.connection.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+            ("system_config", json.dumps(system_config)),
+            ("fingerprint", json.dumps(fingerprint)),
+        ])
+        self.flush(commit=True)
+
+    def close(self):
+        self.connection.close()
+
+    def fetch(self, row, columns):
+        return self.connection.execute(f"SELECT {columns} FROM rows WHERE id = ?", (row,)).fetchone()
+
+    def line(self, row):
+        timestamp, raw = self.fetch(row, "timestamp, raw")
+        return f"{timestamp} {raw}"
+
+    def timestamp(self, row):
+        return self.fetch(row, "timestamp")[0]
+
+    def activity(self, row):
+        return self.fetch(row, "activity")[0]
+
+    def status(self, row):
+        return self.fetch(row, "status")[0]
+
+    def is_error(self, row):
+        return self.status(row) == "error"
+
+    def source(self, row):
+        if not self.has_sources:
+            return None
+        return tuple(self.fetch(row, "source, machine"))
+
+    def record(self, row):
+        timestamp, raw, source, machine = self.fetch(row, "timestamp, raw, source, machine")
+        log_data = json.loads(raw)
+        log_data["timestamp"] = timestamp
+        if self.has_sources:
+            log_data["source_file"], log_data["machine"] = source, machine
+        return log_data
+
+    def row_values(self, row):
+        values = self.row_values_cache.get(row)
+        if values is not None:
+            self.row_values_cache.move_to_end(row)
+            return values
+        timestamp, activity, status, branch, raw = self.fetch(row, "timestamp, activity, status, branch, raw")
+        log_data = json.loads(raw)
+        values = (timestamp, activity, status, branch, preview_value(log_data.get('output_result', 'N/A')),
+                  preview_value(log_data.get('error_message', 'N/A')))
+        self.row_values_cache[row] = values
+        if len(self.row_values_cache) > self.ROW_VALUES_CACHE_SIZE:
+            self.row_values_cache.popitem(last=False)
+        return values
+
+    def filter_rows(self, activity_filter='', error_filter='Any', start=0, time_range=None):
+        """
+        Row ids matching the grid filters, in row order, as RecordStore.filter_rows.
+        Matching activity names are found in Python (there are few of them)
+        and their rows are then read through the activity, status and time indexes.
+        """
+        if not activity_filter and error_filter == "Any" and time_range is None:
+            return range(start, len(self))
+        key = (activity_filter, error_filter, start, len(self), time_range)
+        if key in self.filter_cache:
+            self.filter_cache.move_to_end(key)
+            return self.filter_cache[key]
+
+        conditions = ["id >= ?", "id < ?"]
+        parameters = [start, len(self)]
+        if activity_filter:
+            folded = activity_filter.casefold()
+            activities = [activity for (activity,) in self.connection.execute("SELECT DISTINCT activity FROM rows")
+                          if folded in activity.casefold()]
+            conditions.append(f"activity IN ({', '.join('?' * len(activities))})")
+            parameters.extend(activities)
+        if error_filter != "Any":
+            conditions.append("status = 'error'" if error_filter == "Yes" else "status != 'error'")
+        if time_range is not None:
+            conditions.append("time >= ? AND time < ?")
+            parameters.extend(time_range)
+        with self.stats.timed("filter"):
+            rows = array('I', (row for (row,) in self.connection.execute(
+                f"SELECT id FROM rows WHERE {' AND '.join(conditions)} ORDER BY id", parameters)))
+
+        self.filter_cache[key] = rows
+        if len(self.filter_cache) > self.FILTER_CACHE_SIZE:
+            self.filter_cache.popitem(last=False)
+        return rows
+
+    def time_rows(self, start_time, end_time, start=0):
+        return self.filter_rows(start=start, time_range=(start_time, end_time))
+
+    def error_lines(self, rows=None):
+        # One query through the status index instead of a query per row
+        cursor = self.connection.execute("SELECT id, activity, timestamp || ' ' || raw FROM rows "
+                                         "WHERE status = 'error' AND id < ? ORDER BY id", (len(self),))
+        if rows is None:
+            return cursor
+        members = rows if isinstance(rows, range) else set(rows)
+        return (error for error in cursor if error[0] in members)
+
+    def error_messages(self, rows=None):
+        return ((row, activity, error_message(line)) for row, activity, line in self.error_lines(rows))
+
+    def time_histogram(self):
+        """
+        TimeHistogram of the committed rows, with the timestamps read in order through the time index.
+        """
+        if self.histogram is None or self.histogram.rows != len(self):
+            with self.stats.timed("histogram"):
+                query = "SELECT time FROM rows WHERE time IS NOT NULL AND id < ? {}ORDER BY time"
+                times = array('d', (value for (value,) in self.connection.execute(query.format(''), (len(self),))))
+                error_times = array('d', (value for (value,) in self.connection.execute(
+                    query.format("AND status = 'error' "), (len(self),))))
+                self.histogram = TimeHistogram(times, error_times, len(self))
+        return self.histogram
+
+
+def format_size(size):
+    for unit in ('bytes', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'bytes' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def preview_value(value, limit=GRID_VALUE_CHARS):
+    """
+    A field value as text for a grid cell, cut to limit characters with its full size appended when longer.
+    """
+    text = value if isinstance(value, str) else json.dumps(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{format_size(len(text.encode('utf-8', errors='replace')))}]"
+
+
+def iter_pretty_json(data, chunk_chars=PRETTY_CHUNK_CHARS):
+    """
+    Pretty-print data as json.dumps(data, indent=4) would, in chunks of about chunk_chars characters.
+    The whole text is never built, so a viewer can show the first page of
+    a huge entry right away and the clipboard can be filled piece by piece.
+    """
+    chunk = []
+    size = 0
+    for piece in json.JSONEncoder(indent=4).iterencode(data):
+        if len(piece) > chunk_chars:
+            # A long string value is cut into chunks too
+            if chunk:
+                yield ''.join(chunk)
+                chunk = []
+                size = 0
+            for start in range(0, len(piece), chunk_chars):
+                yield piece[start:start + chunk_chars]
+            continue
+        chunk.append(piece)
+        size += len(piece)
+        if size >= chunk_chars:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+def search_text(log_data):
+    """
+    The text of an entry that searches look at: its output result and error message.
+    """
+    return f"{log_data.get('output_result', '')}\n{log_data.get('error_message', '')}"
+
+
+class TextIndex:
+    """
+    Inverted index from the words of every row's search_text to the rows they appear in.
+    Words are runs of \\w characters, case-folded, and a row is listed once
+    per word. The index covers the rows below rows, it is extended by the
+    searches that need it. A search string is looked up word by word: words
+    inside it must appear whole, while its first and last words may be the
+    end or the start of a longer word. Those are found by str.find over
+    the vocabulary kept as one string, instead of comparing every word in
+    Python, and are only looked up from PARTIAL_WORD_CHARS
+    characters on, since shorter ones match most of the vocabulary anyway.
+    """
+
+    def __init__(self):
+        self.postings = {}  # Word -> sorted row ids
+        self.rows = 0  # Rows indexed so far
+        self.vocabulary = '\n'  # Every word of postings followed by a newline
+        self.vocabulary_words = 0  # Words of postings already in vocabulary
+
+    def add(self, row, text):
+        for word in set(WORD_PATTERN.findall(text.casefold())):
+            rows = self.postings.get(word)
+            if rows is None:
+                rows = self.postings[word] = array('I')
+            rows.append(row)
+
+    def matching_words(self, word, open_start, open_end):
+        """
+        Words of the vocabulary that contain word, end with it (open_start) or start with it (open_end).
+        """
+        if len(self.postings) > self.vocabulary_words:
+            # Dicts keep their insertion order, so the new words are the last ones
+            self.vocabulary += ''.join(f'{other}\n' for other in islice(self.postings, self.vocabulary_words, None))
+            self.vocabulary_words = len(self.postings)
+        vocabulary = self.vocabulary
+        # The newlines around a word pin the side that has to match whole
+        needle = ('' if open_start else '\n') + word + ('' if open_end else '\n')
+        shift = 0 if open_start else 1
+        words = []
+        position = vocabulary.find(needle)
+        while position != -1:
+            start = vocabulary.rfind('\n', 0, position + shift) + 1
+            end = vocabulary.find('\n', position + shift + len(word))
+            words.append(vocabulary[start:end])
+            position = vocabulary.find(needle, end)
+        return words
+
+    def candidates(self, literals):
+        """
+        Sorted row ids whose text may contain all of literals, ignoring case.
+        Returns None when no literal has a word to look up.
+        """
+        row_sets = []
+        for literal in literals:
+            folded = literal.casefold()
+            for match in WORD_PATTERN.finditer(folded):
+                word = match.group()
+                open_start = match.start() == 0  # May be the end of a longer word
+                open_end = match.end() == len(folded)  # May be the start of a longer word
+                if not (open_start or open_end):
+                    words = [word] if word in self.postings else []
+                elif len(word) >= PARTIAL_WORD_CHARS:
+                    words = self.matching_words(word, open_start, open_end)
+                else:
+                    continue
+                row_sets.append(union_rows([self.postings[other] for other in words]))
+        if not row_sets:
+            return None
+        return intersect_rows(row_sets)
+
+
+def required_literals(pattern):
+    """
+    Plain strings that every match of a regular expression contains, as far as a simple scan can tell.
+    Only runs of plain characters outside groups and character classes
+    count, a character made optional by a quantifier ends its run, and
+    patterns with alternations or inline flags give none. The literals can
+    miss some requirements but never claim a wrong one, so they are safe to
+    narrow a search with.
+    """
+    if '|' in pattern or '(?' in pattern:
+        return []
+    literals = []
+    run = []
+    depth = 0
+    index = 0
+
+    def end_run():
+        if run:
+            literals.append(''.join(run))
+            run.clear()
+
+    while index < len(pattern):
+        char = pattern[index]
+        index += 1
+        if char == '\\' and index < len(pattern):
+            escaped = pattern[index]
+            index += 1
+            if not escaped.isalnum():
+                if depth == 0:
+                    run.append(escaped)
+                continue
+            # A class, anchor, reference or character code: skip its arguments too
+            end_run()
+            if escaped == 'N' and pattern[index:index + 1] == '{':
+                index = pattern.find('}', index) + 1 or len(pattern)
+                continue
+            while index < len(pattern) and pattern[index].isalnum():
+                index += 1
+        elif char == '[':
+            end_run()
+            if pattern[index:index + 1] == '^':
+                index += 1
+            if pattern[index:index + 1] == ']':
+                index += 1
+            while index < len(pattern) and pattern[index] != ']':
+                index += 2 if pattern[index] == '\\' else 1
+            index += 1
+        elif char in '*?{':
+            if run:
+                run.pop()  # The character before may not be there at all
+            end_run()
+            if char == '{':
+                index = pattern.find('}', index) + 1 or len(pattern)
+        elif char == '(':
+            end_run()
+            depth += 1
+        elif char == ')':
+            end_run()
+            depth -= 1
+        elif char in '.^$+':
+            end_run()
+        elif depth == 0:
+            run.append(char)
+    end_run()
+    return literals
+
+
+def iter_search(store, query, regex=False, raw=False, rows=None):
+    """
+    Search rows for query, yielding the matching row ids in chunks, in row order.
+    The output result and error message are searched, or the whole raw
+    line with raw. Case is ignored. In a store that can index its text,
+    the rows are first narrowed through the text index to those holding
+    the words of the query (or of the literals a regex requires), and only
+    those are decoded and matched. The index is extended here, a chunk of
+    rows per step, when the search covers most of the store. rows limits
+    the search to a sorted set of row ids, such as a filtered view. A chunk
+    is yielded for every SEARCH_CHUNK_ROWS rows checked, even when empty,
+    so a caller can spread a long search over several steps.
+    """
+    pattern = re.compile(query if regex else re.escape(query), re.IGNORECASE)
+    if rows is None:
+        rows = range(len(store))
+    if not raw and getattr(store, 'index_text', False):
+        text_index = store.text_index
+        if text_index is None:
+            text_index = store.text_index = TextIndex()
+        # Only a search over most of the rows extends the index, a narrow view is cheaper to scan
+        count = len(store)
+        if count - text_index.rows <= 2 * len(rows):
+            for start in range(text_index.rows, count, SEARCH_CHUNK_ROWS):
+                end = min(start + SEARCH_CHUNK_ROWS, count)
+                with store.stats.timed("text index"):
+                    for row in range(start, end):
+                        text_index.add(row, search_text(store.record(row)))
+                text_index.rows = end
+                yield []
+        candidates = text_index.candidates(required_literals(query) if regex else [query])
+        if candidates is not None:
+            # Rows the index doesn't cover yet are all checked
+            indexed = text_index.rows
+            if isinstance(rows, range):
+                covered = candidates[bisect_left(candidates, rows.start):bisect_left(candidates, rows.stop)]
+                rows = covered + array('I', range(max(rows.start, indexed), rows.stop))
+            else:
+                split = bisect_left(rows, indexed)
+                rows = intersect_rows([candidates, rows[:split]]) + array('I', rows[split:])
+    for start in range(0, len(rows), SEARCH_CHUNK_ROWS):
+        matches = []
+        for row in rows[start:start + SEARCH_CHUNK_ROWS]:
+            text = store.line(row) if raw else search_text(store.record(row))
+            if pattern.search(text):
+                matches.append(row)
+        yield matches
+
+
+def error_message(line):
+    """
+    The error message of a raw log line, read without decoding the whole JSON when it is a plain string.
+    """
+    position = line.find(ERROR_MESSAGE_KEY, line.find(' ') + 1)
+    if position == -1:
+        return ''
+    position += len(ERROR_MESSAGE_KEY)
+    if line.startswith(': "', position):
+        # The usual json.dumps spacing: the value ends at the next quote unless that one is escaped
+        end = line.find('"', position + 3)
+        if end != -1 and line[end - 1] != '\\' and line.find(ERROR_MESSAGE_KEY, end) == -1:
+            value = line[position + 3:end]
+            return json.loads(f'"{value}"') if '\\' in value else value
+    match = STRING_VALUE_PATTERN.match(line, position)
+    if match is not None and line.find(ERROR_MESSAGE_KEY, match.end()) == -1:
+        value = match.group(1)
+        return json.loads(f'"{value}"') if '\\' in value else value
+    parts = split_log_line(line)
+    value = parts[1].get('error_message', '') if parts is not None else ''
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def error_template(message):
+    """
+    Mask the variable parts of an error message: URLs, emails, paths, ids, quoted values and numbers.
+    """
+    for hint, pattern, replacement in ERROR_MASKS:
+        if hint in message:
+            message = pattern.sub(replacement, message)
+    return ' '.join(message.split())
+
+
+def cluster_errors(store, rows=None):
+    """
+    Group the error rows whose messages only differ in their variable parts.
+    rows limits the clustering to some sorted row ids. Every distinct
+    message is masked once and rows are grouped by a dict of templates.
+    Returns one dict per template, most frequent first, with the count,
+    the sorted row ids, the first and last timestamps and the number of
+    rows per activity.
+    """
+    templates = {}  # Template of every distinct message seen
+    clusters = {}
+    with store.stats.timed("error clustering"):
+        for row, activity, message in store.error_messages(rows):
+            template = templates.get(message)
+            if template is None:
+                template = templates[message] = error_template(message)
+            cluster = clusters.get(template)
+            if cluster is None:
+                cluster = clusters[template] = {"template": template, "rows": array('I'), "activities": {}}
+            cluster["rows"].append(row)
+            cluster["activities"][activity] = cluster["activities"].get(activity, 0) + 1
+        for cluster in clusters.values():
+            cluster["count"] = len(cluster["rows"])
+            cluster["first_timestamp"] = store.timestamp(cluster["rows"][0])
+            cluster["last_timestamp"] = store.timestamp(cluster["rows"][-1])
+    return sorted(clusters.values(), key=itemgetter("count"), reverse=True)
+
+
+class SummaryStore(RecordStore):
+    """
+    Record store for a single pass over a log whose rows can't be read back by offset, like a compressed one.
+    The text of the rows is dropped as they are appended. Only what a
+    summary reads from it is kept: the timestamp of every row, packed in
+    one buffer, and the error message of every error row.
+    """
+
+    def __init__(self):
+        super().__init__(index_text=False)
+        self.timestamp_text = bytearray()
+        self.timestamp_ends = array('Q')  # End of every row's timestamp in timestamp_text
+        self.messages = StringTable()
+        self.message_codes = array('I')  # Message code of every error row, in row order
+
+    def append(self, line, log_data, offset=0, source=None):
+        row = super().append(None, log_data, offset, source)
+        self.timestamp_text += log_data.get('timestamp', '').encode('utf-8')
+        self.timestamp_ends.append(len(self.timestamp_text))
+        if log_data.get('status') == 'error':
+            self.message_codes.append(self.messages.code(error_message(line)))
+        return row
+
+    def timestamp(self, row):
+        start = self.timestamp_ends[row - 1] if row else 0
+        return self.timestamp_text[start:self.timestamp_ends[row]].decode('utf-8')
+
+    def error_messages(self, rows=None):
+        errors = self.error_matches(True)
+        activities = self.activities.values
+        messages = self.messages.values
+        if rows is None:
+            return ((row, activities[self.activity_codes[row]], messages[code])
+                    for row, code in zip(errors, self.message_codes))
+        return ((row, activities[self.activity_codes[row]], messages[self.message_codes[bisect_left(errors, row)]])
+                for row in intersect_rows([errors, rows]))
+
+
+def summarize_log(path, line_filter=None, max_error_rows=100, top=10):
+    """
+    Parse one log file and return a JSON-ready summary of it, for batch runs.
+    Plain files are memory-mapped and only their grid columns are kept, so
+    memory stays bounded by the number of rows rather than the file size.
+    Compressed files are streamed once into a SummaryStore, which drops the
+    text of the rows as they are read.
+    The summary holds the system config, row counts per status, the first
+    max_error_rows error rows, the top error clusters and the top activities
+    by total time with their slowest rows.
+    """
+    start = time.perf_counter()
+    compressed = is_compressed(path)
+    store = SummaryStore() if compressed else RecordStore(index_text=False)
+    store.line_filter = line_filter
+    try:
+        if compressed:
+            system_config = load_log_file(path, store, line_filter=line_filter)
+        else:
+            system_config = index_log_file(path, store, line_filter=line_filter)
+        count = len(store)
+        activities = store.analytics().summary()[:top]
+        for activity in activities:
+            activity["slowest"] = [{"row": row, "timestamp": store.timestamp(row), "seconds": seconds}
+                                   for row, seconds in activity["slowest"]]
+        error_rows = [{"row": row, "timestamp": store.timestamp(row), "activity": activity,
+                       "error_message": message}
+                      for row, activity, message in islice(store.error_messages(), max_error_rows)]
+        clusters = [{key: cluster[key] for key in ("template", "count", "activities", "first_timestamp",
+                                                   "last_timestamp")}
+                    for cluster in cluster_errors(store)[:top]]
+        return {
+            "path": path,
+            "bytes": log_size(path),
+            "machine": machine_name(system_config),
+            "system_config": system_config,
+            "rows": count,
+            "first_timestamp": store.timestamp(0) if count else None,
+            "last_timestamp": store.timestamp(count - 1) if count else None,
+            "statuses": {status: len(rows) for status, rows in zip(store.statuses.values, store.status_rows)},
+            "errors": len(store.error_matches(True)),
+            "error_rows": error_rows,
+            "error_clusters": clusters,
+            "activities": activities,
+            "timed": line_filter is None,  # A filtered load has no durations
+            "parse_seconds": round(time.perf_counter() - start, 3),
+        }
+    finally:
+        store.close()
+
+
+def file_fingerprint(path):
+    """
+    Identity of a log file: absolute path, size, mtime and a hash of its first and last bytes.
+    """
+    stat = os.stat(path)
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        digest.update(file.read(FINGERPRINT_BYTES))
+        if stat.st_size > FINGERPRINT_BYTES:
+            file.seek(max(FINGERPRINT_BYTES, stat.st_size - FINGERPRINT_BYTES))
+            digest.update(file.read(FINGERPRINT_BYTES))
+    return {"path": os.path.abspath(path), "size": stat.st_size,
+            "mtime": stat.st_mtime_ns, "hash": digest.hexdigest()}
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed logs, one binary entry per log file path.
+    An entry holds the record store columns, line offsets, filter indexes and
+    system config, so an unchanged log is reopened without decoding any JSON.
+    Entries are dropped when the file's fingerprint changes, and the least
+    recently used ones are evicted once the cache grows past max_bytes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def entry_path(self, path):
+        name = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + '.plc')
+
+    def load(self, path):
+        """
+        Return the cached RecordStore of a log file, or None if it is missing or stale.
+        Compressed logs are never cached, their rows can't be read back by offset.
+        """
+        entry = self.entry_path(path)
+        if is_compressed(path) or not os.path.exists(entry):
+            return None
+        try:
+            with open(entry, 'rb') as file:
+                if file.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                    raise ValueError("Not a parse cache entry")
+                header_size = int.from_bytes(file.read(4), 'little')
+                header = json.loads(file.read(header_size))
+                if header["fingerprint"] != file_fingerprint(path):
+                    logging.info(f"Parse cache entry for {path} is stale")
+                    file.close()
+                    os.remove(entry)
+                    return None
+                store = self.read_store(file, header)
+            store.path = path
+            os.utime(entry)  # Mark as recently used
+            return store
+        except (OSError, ValueError, KeyError, EOFError) as e:
+            logging.error(f"Could not read parse cache entry for {path}: {e}")
+            return None
+
+    def read_store(self, file, header):
+        store = RecordStore(index_text=False)  # Only the grid columns are cached
+        rows = header["rows"]
+        for column in (store.times, store.activity_codes, store.status_codes, store.branch_codes, store.offsets):
+            column.fromfile(file, rows)
+        for name in ("activities", "statuses", "branches"):
+            table = getattr(store, name)
+            for value in header[name]:
+                table.code(value)
+        store.activity_folded = [name.casefold() for name in store.activities.values]
+        store.activity_rows = self.read_postings(file, header["activity_counts"])
+        store.status_rows = self.read_postings(file, header["status_counts"])
+        store.system_config = header["system_config"]
+        store.end_offset = header.get("end_offset", 0)  # Missing from entries written by older versions
+        return store
+
+    def read_postings(self, file, counts):
+        postings = []
+        for count in counts:
+            rows = array('I')
+            rows.fromfile(file, count)
+            postings.append(rows)
+        return postings
+
+    def save(self, path, store, fingerprint):
+        """
+        Write the cache entry of a log file.
+        fingerprint must be taken before parsing started, so a file that changed
+        while it was being parsed is not cached under its new identity.
+        """
+        try:
+            # A filtered load only holds part of the file
+            if store.line_filter is not None or is_compressed(path) or fingerprint != file_fingerprint(path):
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            header = json.dumps({
+                "fingerprint": fingerprint,
+                "rows": len(store),
+                "activities": store.activities.values,
+                "statuses": store.statuses.values,
+                "branches": store.branches.values,
+                "activity_counts": [len(rows) for rows in store.activity_rows],
+                "status_counts": [len(rows) for rows in store.status_rows],
+                "system_config": store.system_config,
+                "end_offset": store.end_offset,
+            }).encode('utf-8')
+            entry = self.entry_path(path)
+            temp_path = entry + '.tmp'
+            with open(temp_path, 'wb') as file:
+                file.write(CACHE_MAGIC)
+                file.write(len(header).to_bytes(4, 'little'))
+                file.write(header)
+                for column in (store.times, store.activity_codes, store.status_codes, store.branch_codes,
+                               store.offsets):
+                    column.tofile(file)
+                for rows in store.activity_rows + store.status_rows:
+                    rows.tofile(file)
+            os.replace(temp_path, entry)  # Readers never see a half written entry
+            self.evict(keep=entry)
+        except OSError as e:
+            logging.error(f"Could not write parse cache entry for {path}: {e}")
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.plc'):
+                entry = os.path.join(self.directory, name)
+                stat = os.stat(entry)
+                entries.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry != keep:
+                os.remove(entry)
+                total -= size
+
+
+class LogFollower:
+    """
+    Follows a log file that is still being written and appends new rows to a store.
+    Only complete lines past the last offset are parsed, so each poll costs
+    as much as the data appended since the previous one.
+    """
+
+    HEAD_BYTES = 4096  # Bytes compared to tell a rewritten file from an appended one
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.offset = offset
+        self.identity = None
+        self.head = b''
+        self.remember_identity()
+
+    @classmethod
+    def resume(cls, path, store):
+        """
+        Start following where the loader of store stopped reading.
+        That is past the lines a filtered load skipped, too. Stores that
+        don't know it resume after their last row.
+        """
+        offset = store.end_offset
+        if not offset and len(store):
+            with open(path, 'rb') as file:
+                file.seek(store.offsets[-1])
+                offset = store.offsets[-1] + len(file.readline())
+        return cls(path, offset)
+
+    def remember_identity(self):
+        stat = os.stat(self.path)
+        self.identity = (stat.st_dev, stat.st_ino)
+        with open(self.path, 'rb') as file:
+            self.head = file.read(min(self.offset, self.HEAD_BYTES))
+
+    def replaced(self):
+        """
+        True if the file was truncated, rotated or rewritten since the last poll.
+        """
+        stat = os.stat(self.path)
+        if (stat.st_dev, stat.st_ino) != self.identity or stat.st_size < self.offset:
+            return True
+        with open(self.path, 'rb') as file:
+            return file.read(len(self.head)) != self.head
+
+    def pending(self):
+        """
+        Number of bytes appended since the last poll.
+        """
+        return max(0, os.path.getsize(self.path) - self.offset)
+
+    def poll(self, store, max_bytes=4 * 1024 * 1024, keep_lines=None):
+        """
+        Append the complete lines written since the last poll to store, reading
+        at most about max_bytes. Returns the number of rows added, or None if
+        the file was replaced and has to be loaded again from the start.
+        keep_lines tells whether to keep the text of the rows, by default
+        when store keeps it; a batch that is merged into another store later
+        must follow that store.
+        """
+        if self.replaced():
+            return None
+        if keep_lines is None:
+            keep_lines = len(store.lines) == len(store)
+        added = 0
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset)
+            start = self.offset
+            for offset, line_bytes in iter_line_bytes(file, self.offset, partial=False):
+                self.offset = offset + len(line_bytes) + 1
+                if store.line_filter is not None and not store.line_filter.accepts_line(line_bytes):
+                    continue
+                line = line_bytes.decode('utf-8', errors='replace')
+                parsed = split_log_line(line)
+                if parsed is not None:
+                    timestamp, log_data = parsed
+                    system_config = extract_system_config(timestamp, log_data)
+                    if system_config:
+                        store.system_config = system_config
+                    elif store.line_filter is None or store.line_filter.accepts(log_data):
+                        log_data["timestamp"] = timestamp
+                        store.append(line if keep_lines else None, log_data, offset)
+                        added += 1
+                if self.offset - start >= max_bytes:
+                    break
+        store.end_offset = self.offset
+        if len(self.head) < self.HEAD_BYTES:
+            self.remember_identity()
+        return added
+
+
+def split_byte_ranges(path, parts, min_size=PARALLEL_RANGE_BYTES):
+    """
+    Split a file into at most parts (start, end) byte ranges that begin and end on line boundaries.
+    """
+    size = os.path.getsize(path)
+    parts = max(1, min(parts, size // min_size))
+    boundaries = [0]
+    with open(path, 'rb') as file:
+        for part in range(1, parts):
+            position = size * part // parts
+            if position <= boundaries[-1]:
+                continue
+            file.seek(position - 1)
+            file.readline()  # Move to the start of the next line
+            if file.tell() >= size:
+                break
+            if file.tell() > boundaries[-1]:
+                boundaries.append(file.tell())
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def parse_byte_range(path, start, end, lazy=False, line_filter=None, sample_every=0):
+    """
+    Parse the lines starting between two byte offsets of a log file into a RecordStore.
+    This is the work done by each process of a parallel parse: the system
+    config is detected and entries get their timestamp added. Rows are
+    returned without their text, they are read back from the file by offset,
+    so only compact columns (and the worker's stats) travel between processes.
+    """
+    store = RecordStore(index_text=not lazy)
+    store.path = path
+    stats = store.stats
+    stats.sample_every = sample_every
+    lines = 0
+    with open(path, 'rb') as file:
+        file.seek(start)
+        for offset, line_bytes in iter_line_bytes(file, start, stats=stats):
+            if offset >= end:
+                store.end_offset = offset
+                break
+            lines += 1
+            timed = sample_every and lines % sample_every == 0
+            if timed:
+                clock = stats.clock(sample_every)
+            if line_filter is not None and not line_filter.accepts_line(line_bytes):
+                continue
+            if lazy:
+                parsed = decode_grid_fields(line_bytes)
+            else:
+                parsed = split_log_line(line_bytes.decode('utf-8', errors='replace'))
+            if timed:
+                clock.lap("decode grid fields" if lazy else "json.loads")
+            if parsed is None:
+                continue
+            timestamp, log_data = parsed
+            system_config = extract_system_config(timestamp, log_data)
+            if system_config:
+                if store.system_config is None:
+                    store.system_config = system_config
+            elif line_filter is None or line_filter.accepts(log_data):
+                log_data["timestamp"] = timestamp
+                store.append(None, log_data, offset)
+                if timed:
+                    clock.lap("process_parsed_data")
+        else:
+            store.end_offset = file.tell()  # The last range runs to the end of the file
+    stats.count("lines", lines)
+    return store
+
+
+def parse_log_parallel(path, store, lazy=False, workers=None, on_progress=None, line_filter=None,
+                       executor=None, cancel=None):
+    """
+    Parse a log file into store using a pool of worker processes.
+    The file is cut into line-aligned byte ranges, each range is parsed by
+    parse_byte_range and the results are merged into store in file order.
+    on_progress(position, size) is called as ranges are merged. The ranges
+    are run on executor when one is given, so several loads can share a
+    bounded pool, and on a pool of their own otherwise. Once the cancel event
+    is set the ranges not started yet are dropped and LoadCancelled is raised.
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    ranges = split_byte_ranges(path, workers * 4)
+    store.path = path
+    sample_every = store.stats.sample_every
+    if len(ranges) == 1:
+        store.extend(parse_byte_range(path, 0, size, lazy, line_filter, sample_every))
+        return store.system_config
+
+    own_executor = None
+    if executor is None:
+        executor = own_executor = ProcessPoolExecutor(max_workers=min(workers, len(ranges)))
+    futures = [executor.submit(parse_byte_range, path, start, end, lazy, line_filter, sample_every)
+               for start, end in ranges]
+    try:
+        for (start, end), future in zip(ranges, futures):
+            while cancel is not None:
+                if cancel.is_set():
+                    raise LoadCancelled(path)
+                if wait([future], timeout=0.1).done:
+                    break
+            chunk = future.result()
+            with store.stats.timed("merge"):
+                store.extend(chunk)
+            if on_progress is not None:
+                on_progress(end, size)
+    finally:
+        for future in futures:
+            future.cancel()  # Only ranges that have not started, after an error or a cancel
+        if own_executor is not None:
+            own_executor.shutdown()
+    return store.system_config
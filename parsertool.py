@@ -1,40 +1,95 @@
+import bisect
 import json
+import math
+import re
+import sqlite3
 import threading
 import io
+import itertools
+from array import array
+import queue
+import time
 import logging
+import lzma
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import webbrowser
+import zipfile
+import zlib
 import os
-import uuid
 import tkinter as tk
 from tkinter import ttk, filedialog, StringVar
 import tkinter.font as tkFont
-from collections import deque
 import logging
 import traceback
 import tkinter.messagebox as messagebox
+from datetime import datetime, timedelta
+import logengine
 
-logging.basicConfig(filename='app.log', level=logging.DEBUG, 
+logging.basicConfig(filename='app.log', level=logging.INFO, 
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
+def format_time(value):
+    return datetime.fromtimestamp(value).isoformat(sep=' ', timespec='seconds')
+
+
+def format_seconds(seconds):
+    for unit, size in (("d", 86400), ("h", 3600), ("min", 60)):
+        if seconds >= size and seconds % size == 0:
+            return f"{seconds // size:g} {unit}"
+    return f"{seconds:g} s"
+
+
 class LogProcessor:
-    def __init__(self, root):
+    def __init__(self, root, parent=None, tabs=None):
         logging.info("Initializing LogProcessor")
         self.root = root
+        self.frame = root if parent is None else parent  # Where the widgets of this log go
+        self.tabs = tabs  # LogTabs this log is a tab of, if any
+        self.title = "ElectroNeek Log Parser"
         self.setup_ui() 
 
         try:
-            self.treeview_data = deque()  # Update here
-            self.processing_thread = None
+            self.store = logengine.RecordStore()  # Parsed entries, addressed by row id
+            self.processing_thread = None  # Future of the load running on the worker pool
+            self.cancel_event = None  # Set to stop the running load
+            self._load_pool = None  # Used when this log has no tabs to share a pool with
+            self.events = None  # Queue the parsing thread posts rows and progress to
+            self.event_budget = 30  # Milliseconds of UI time spent on posted events per call
+            self.parse_cache = logengine.ParseCache()
+            self.current_file = None  # Log file shown, None for several merged files
+            self.current_files = []  # All log files shown
+            self.follower = None  # Reads rows appended to current_file while following
+            self.follow_interval = 1000  # Milliseconds between checks of a followed file
+            self.perf_sample_every = 100  # Per-line stages are timed on one line in this many, 0 is off
             self.config_labels = {}
-            self.processed_data = []
-            self.full_log_data = {}
             self.logs_tree = self.setup_ui()
-            self.current_offset = 0  # Track the current offset in the logs
-            self.chunk_size = 1000  # Define how many entries to load at once
+            self.view_rows = range(0)  # Row ids of the current (filtered) view
+            self.view_top = 0  # Position in view_rows of the first row on screen
+            self.page_size = 1  # Number of rows that fit in the Treeview
+            self.visible_rows = []  # Row id shown in each Treeview slot
+            self.selected_row_id = None
             self.treeview_loaded = True
             self.progress_bar.grid_remove()  # This hides the progress bar
             self.activity_filter = ''
             self.error_filter = 'Any'
+            self.search_query = ''  # Text the view is narrowed to, '' shows all filtered rows
+            self.search = None  # Iterator of the running search, yielding chunks of matching rows
+            self.search_generation = 0  # Bumped when a search is restarted, so old steps stop
+            self.search_delay = 300  # Milliseconds of typing pause before searching
+            self.search_after = None
+            self.histogram = None  # TimeHistogram drawn on the timeline
+            self.time_range = None  # (start, end) epoch seconds the view is limited to
+            self.timeline_view = None  # (start, end) shown on the timeline when zoomed in
+            self.timeline_width = 1  # Seconds per bar of the timeline as drawn
+            self.timeline_press = None  # x where a click or drag on the timeline started
+            self.analytics_refresh = None  # Refreshes the open analytics window
+            self.analytics_interval = 1.0  # Seconds between refreshes of the analytics window while rows stream in
+            self.analytics_refreshed = 0.0
+            self.cluster_rows = None  # Row ids of the error cluster the view is limited to
+            self.call_tree_page = 200  # Entries of a call tree level inserted at a time
+            self.detail_page_chars = 100000  # Characters of pretty-printed text added to a detail view at a time
+            self.detail_tree_page = 200  # Children of a JSON node inserted at a time
         except Exception as e:
             logging.error(f"An error occurred during initialization of LogProcessor: {e}\n{traceback.format_exc()}")
             return None
@@ -45,10 +100,11 @@ class LogProcessor:
         The expected format is a series of lines with a timestamp followed by JSON data.
         """
         try:
-            # Open the file and read the first few lines to check the format
-            with io.BufferedReader(io.FileIO(file_path, 'r')) as file:
-                for _ in range(10):  # Read up to first 10 lines for the sake of checking
-                    line = file.readline().decode('utf-8', errors='replace').strip()
+            # Open the file (decompressing it if needed) and read the first few lines to check the format
+            with logengine.LogReader(file_path) as reader:
+                lines = logengine.iter_line_bytes(reader.stream)
+                for _, line_bytes in itertools.islice(lines, 10):  # Read up to first 10 lines for the sake of checking
+                    line = line_bytes.decode('utf-8', errors='replace').strip()
                     if not line:  # Skip empty lines if any
                         continue
                     
@@ -61,7 +117,9 @@ class LogProcessor:
                         raise ValueError("Line does not match expected format.")
             # The above will raise an error if the format is incorrect
             return True
-        except (IOError, ValueError, json.JSONDecodeError) as e:
+        except (IOError, ValueError, EOFError, KeyError, json.JSONDecodeError, lzma.LZMAError, zlib.error,
+                zipfile.BadZipFile) as e:
+            # The others come from truncated or corrupt compressed files and missing zip members
             logging.error(f"File validation error: {e}")
             return False
         
@@ -70,29 +128,66 @@ class LogProcessor:
         try:
             self.root.resizable(True, True)
             self.root.title("ElectroNeek Log Parser")
-            # Grid configuration for root
-            self.root.grid_rowconfigure(0, weight=0)  # Button frame
-            self.root.grid_rowconfigure(1, weight=0)  # Separator 1
-            self.root.grid_rowconfigure(2, weight=0)  # Config frame
-            self.root.grid_rowconfigure(3, weight=0)  # Progress bar
-            self.root.grid_rowconfigure(4, weight=0)  # Separator 2
-            self.root.grid_rowconfigure(5, weight=1)  # Logs frame
-            self.root.grid_rowconfigure(6, weight=1)  # Logs frame
+            # Grid configuration for the frame holding this log (the root window or a tab)
+            self.frame.grid_rowconfigure(0, weight=0)  # Button frame
+            self.frame.grid_rowconfigure(1, weight=0)  # Separator 1
+            self.frame.grid_rowconfigure(2, weight=0)  # Config frame
+            self.frame.grid_rowconfigure(3, weight=0)  # Progress bar
+            self.frame.grid_rowconfigure(4, weight=0)  # Separator 2
+            self.frame.grid_rowconfigure(5, weight=1)  # Logs frame
+            self.frame.grid_rowconfigure(6, weight=1)  # Logs frame
             # Button frame with padding to align buttons with "Complete logs" tree
-            self.button_frame = tk.Frame(self.root)
+            self.button_frame = tk.Frame(self.frame)
             self.button_frame.grid(row=0, column=0, sticky='w', padx=10, pady=10)
             self.button_frame.grid_columnconfigure(0, weight=1)
             self.button_frame.grid_columnconfigure(1, weight=1)
             self.file_button = tk.Button(self.button_frame, text="Open File", command=self.open_file)  # Assuming the command is already defined
             self.file_button.grid(row=0, column=0, padx=5, pady=5)
+            self.preview_button = tk.Button(self.button_frame, text="Preview File", command=self.open_preview)
+            self.preview_button.grid(row=0, column=1, padx=5, pady=5)
             self.help_button = tk.Button(self.button_frame, text="Help", command=self.open_help)  # Assuming the command is already defined
-            self.help_button.grid(row=0, column=1, padx=5, pady=5)
-            self.separator1 = ttk.Separator(self.root, orient='horizontal')
+            self.help_button.grid(row=0, column=2, padx=5, pady=5)
+            # Memory-mapped mode keeps only line offsets and grid columns, for files bigger than memory
+            self.memory_mapped_var = tk.BooleanVar(value=False)
+            self.memory_mapped_check = tk.Checkbutton(self.button_frame, text="Low memory mode (memory-mapped)",
+                                                      variable=self.memory_mapped_var)
+            self.memory_mapped_check.grid(row=0, column=3, padx=5, pady=5)
+            self.follow_var = tk.BooleanVar(value=False)
+            self.follow_check = tk.Checkbutton(self.button_frame, text="Follow (live tail)",
+                                               variable=self.follow_var, command=self.toggle_follow)
+            self.follow_check.grid(row=0, column=4, padx=5, pady=5)
+            self.parallel_var = tk.BooleanVar(value=False)
+            self.parallel_check = tk.Checkbutton(self.button_frame, text="Parallel parsing (all cores)",
+                                                 variable=self.parallel_var)
+            self.parallel_check.grid(row=0, column=5, padx=5, pady=5)
+            # SQLite mode pages rows from a database file, for logs larger than memory
+            self.sqlite_var = tk.BooleanVar(value=False)
+            self.sqlite_check = tk.Checkbutton(self.button_frame, text="SQLite storage (largest logs)",
+                                               variable=self.sqlite_var)
+            self.sqlite_check.grid(row=0, column=6, padx=5, pady=5)
+            self.performance_button = tk.Button(self.button_frame, text="Performance", command=self.open_performance)
+            self.performance_button.grid(row=0, column=7, padx=5, pady=5)
+            self.analytics_button = tk.Button(self.button_frame, text="Analytics", command=self.open_analytics)
+            self.analytics_button.grid(row=0, column=8, padx=5, pady=5)
+            self.clusters_button = tk.Button(self.button_frame, text="Error Clusters", command=self.open_error_clusters)
+            self.clusters_button.grid(row=0, column=9, padx=5, pady=5)
+            self.call_tree_button = tk.Button(self.button_frame, text="Call Tree", command=self.open_call_tree)
+            self.call_tree_button.grid(row=0, column=10, padx=5, pady=5)
+            self.cancel_button = tk.Button(self.button_frame, text="Cancel Load", command=self.cancel_load,
+                                           state="disabled")
+            self.cancel_button.grid(row=0, column=11, padx=5, pady=5)
+            if self.tabs is not None:
+                self.new_tab_button = tk.Button(self.button_frame, text="New Tab", command=self.tabs.new_tab)
+                self.new_tab_button.grid(row=0, column=12, padx=5, pady=5)
+                self.close_tab_button = tk.Button(self.button_frame, text="Close Tab",
+                                                  command=lambda: self.tabs.close_tab(self))
+                self.close_tab_button.grid(row=0, column=13, padx=5, pady=5)
+            self.separator1 = ttk.Separator(self.frame, orient='horizontal')
             self.separator1.grid(row=1, column=0, sticky='ew', pady=(5, 5))
             # System Config Frame
-            self.root.grid_columnconfigure(0, weight=1)
+            self.frame.grid_columnconfigure(0, weight=1)
             # Set up the system configuration frame
-            self.config_frame = tk.Frame(self.root, padx=10, pady=2)
+            self.config_frame = tk.Frame(self.frame, padx=10, pady=2)
             self.config_frame.grid(row=2, column=0, sticky='ew', pady=(2, 2))
             # To make the system configuration labels and values expandable
             self.config_frame.grid_columnconfigure(1, weight=1)
@@ -100,9 +195,9 @@ class LogProcessor:
             tk.Label(self.config_frame, text="Config Key:").grid(row=0, column=0, sticky='w')
             tk.Label(self.config_frame, text="Config Value", bg="lightgrey").grid(row=0, column=1, sticky='ew')
             self.progress_var = tk.DoubleVar()
-            self.progress_bar = ttk.Progressbar(self.root, variable=self.progress_var, length=400)
+            self.progress_bar = ttk.Progressbar(self.frame, variable=self.progress_var, length=400)
             self.progress_bar.grid(row=3, column=0, pady=(5, 5), padx=(10, 10))
-            self.filter_frame = tk.Frame(self.root, padx=10, pady=2)
+            self.filter_frame = tk.Frame(self.frame, padx=10, pady=2)
             self.filter_frame.grid(row=5, column=0, sticky='ew', pady=(2, 2))  # Placing it below the logs_frame
             tk.Label(self.filter_frame, text="Filter by Activity Name:").grid(row=0, column=0, sticky='w')
             self.activity_filter_combobox = ttk.Combobox(self.filter_frame, values=self.load_activities_from_json())
@@ -116,8 +211,40 @@ class LogProcessor:
             self.filter_button.grid(row=0, column=2, rowspan=2, padx=5, pady=5)
             self.remove_filter_button = tk.Button(self.filter_frame, text="Remove Filter", command=self.remove_filter)
             self.remove_filter_button.grid(row=0, column=3, rowspan=2, padx=5, pady=5)
+            # Loads only the entries matching the filters above, skipping the JSON decoding of the rest
+            self.filtered_load_button = tk.Button(self.filter_frame, text="Open File Filtered",
+                                                  command=self.open_filtered_file)
+            self.filtered_load_button.grid(row=0, column=4, rowspan=2, padx=5, pady=5)
+            # Searches the output results and error messages of the filtered rows
+            tk.Label(self.filter_frame, text="Search:").grid(row=2, column=0, sticky='w')
+            self.search_entry = tk.Entry(self.filter_frame)
+            self.search_entry.grid(row=2, column=1, sticky='ew')
+            self.search_entry.bind("<Return>", lambda event: self.apply_search())
+            self.search_entry.bind("<KeyRelease>", self.on_search_key)
+            self.search_regex_var = tk.BooleanVar(value=False)
+            tk.Checkbutton(self.filter_frame, text="Regex", variable=self.search_regex_var).grid(row=2, column=2)
+            self.search_raw_var = tk.BooleanVar(value=False)
+            tk.Checkbutton(self.filter_frame, text="Raw JSON", variable=self.search_raw_var).grid(row=2, column=3)
+            self.clear_search_button = tk.Button(self.filter_frame, text="Clear Search", command=self.clear_search)
+            self.clear_search_button.grid(row=2, column=4, padx=5, pady=5)
+            self.search_status = tk.Label(self.filter_frame, text="")
+            self.search_status.grid(row=2, column=5, sticky='w')
+            # Rows and errors over time: drag to show a time range, click to jump to a time, wheel to zoom
+            self.timeline = tk.Canvas(self.filter_frame, height=60, bg="white", highlightthickness=0)
+            self.timeline.grid(row=3, column=0, columnspan=6, sticky='ew', pady=(5, 0))
+            self.timeline.bind("<Configure>", lambda event: self.draw_timeline())
+            self.timeline.bind("<ButtonPress-1>", self.on_timeline_press)
+            self.timeline.bind("<B1-Motion>", self.on_timeline_drag)
+            self.timeline.bind("<ButtonRelease-1>", self.on_timeline_release)
+            self.timeline.bind("<MouseWheel>", self.on_timeline_wheel)
+            self.timeline.bind("<Button-4>", self.on_timeline_wheel)  # Wheel on Linux
+            self.timeline.bind("<Button-5>", self.on_timeline_wheel)
+            self.timeline_label = tk.Label(self.filter_frame, text="")
+            self.timeline_label.grid(row=4, column=0, columnspan=4, sticky='w')
+            self.all_times_button = tk.Button(self.filter_frame, text="Show All Times", command=self.clear_time_range)
+            self.all_times_button.grid(row=4, column=4, padx=5, pady=5)
                     
-            self.separator2 = ttk.Separator(self.root, orient='horizontal')
+            self.separator2 = ttk.Separator(self.frame, orient='horizontal')
             self.separator2.grid(row=4, column=0, sticky='ew', pady=(2, 5))
             
             self.config_label = tk.Label(self.config_frame, text="System Configuration", font=("Arial", 12))
@@ -142,7 +269,7 @@ class LogProcessor:
             
 
                         # Create Treeviews
-            self.logs_frame = tk.Frame(self.root)
+            self.logs_frame = tk.Frame(self.frame)
             self.logs_frame.grid(row=6, column=0, sticky='nsew')
             self.logs_frame.grid_rowconfigure(0, weight=1)
             self.logs_frame.grid_columnconfigure(0, weight=1)
@@ -160,18 +287,26 @@ class LogProcessor:
             self.logs_canvas.configure(scrollregion=self.logs_canvas.bbox("all"))
             self.tree_frame.bind("<Configure>", self.on_frame_configure)
         
-            self.logs_tree = ttk.Treeview(self.logs_frame, columns=("Time", "Activity Name", "Status", "Executed Branch", "Output Result", "Error Message"), show="headings")
+            self.logs_tree = ttk.Treeview(self.logs_frame, columns=("Time", "Activity Name", "Status", "Executed Branch", "Output Result", "Error Message", "Source"), show="headings")
             self.logs_tree.grid(row=0, column=0, sticky='nsew')
-            self.logs_tree.bind('<MouseWheel>', self.on_scroll)  # Add this line here
-
-            self.v_scrollbar = ttk.Scrollbar(self.logs_frame, orient="vertical", command=self.logs_tree.yview)
+            # The Treeview only holds the rows on screen, scrolling is driven by the virtual view
+            self.logs_tree.bind('<MouseWheel>', self.on_scroll)
+            self.logs_tree.bind('<Button-4>', self.on_scroll)
+            self.logs_tree.bind('<Button-5>', self.on_scroll)
+            self.logs_tree.bind('<Up>', self.on_key_scroll)
+            self.logs_tree.bind('<Down>', self.on_key_scroll)
+            self.logs_tree.bind('<Prior>', self.on_key_scroll)
+            self.logs_tree.bind('<Next>', self.on_key_scroll)
+            self.logs_tree.bind('<Configure>', self.on_tree_configure)
+            self.logs_tree.bind('<<TreeviewSelect>>', self.on_tree_select)
+
+            self.v_scrollbar = ttk.Scrollbar(self.logs_frame, orient="vertical", command=self.on_virtual_yview)
             self.v_scrollbar.grid(row=0, column=1, sticky='ns')
-            self.logs_tree.config(yscrollcommand=self.v_scrollbar.set)
             self.h_scrollbar = ttk.Scrollbar(self.logs_frame, orient="horizontal", command=self.logs_tree.xview)
             self.h_scrollbar.grid(row=1, column=0, sticky='ew')
             self.logs_tree.config(xscrollcommand=self.h_scrollbar.set)
             # Configure the canvas
-            self.logs_canvas.configure(yscrollcommand=self.v_scrollbar.set, xscrollcommand=self.h_scrollbar.set)
+            self.logs_canvas.configure(xscrollcommand=self.h_scrollbar.set)
             self.logs_canvas.bind('<Configure>', lambda e: self.logs_canvas.configure(scrollregion=self.logs_canvas.bbox("all")))
             # Set up headings for 'Logs' Treeview
             self.logs_tree.heading("Time", text="Time")
@@ -180,13 +315,15 @@ class LogProcessor:
             self.logs_tree.heading("Executed Branch", text="Executed Branch")
             self.logs_tree.heading("Output Result", text="Output Result")
             self.logs_tree.heading("Error Message", text="Error Message")
+            self.logs_tree.heading("Source", text="Source")
+            self.show_source_column(False)  # Only shown for logs merged from several files
             self.logs_tree.tag_configure('error', background='red', foreground='white')
             # Dynamically set the width of the columns based on the title's width
 
             for col in self.logs_tree["columns"]:
                 self.logs_tree.column(col, width=tkFont.Font().measure(col.title()), minwidth=50, stretch=tk.YES)
-            self.root.grid_rowconfigure(2, weight=1)  # To make the logs_frame expand vertically
-            self.root.grid_columnconfigure(0, weight=1)  # To make all columns in the main window expand horizontally
+            self.frame.grid_rowconfigure(2, weight=1)  # To make the logs_frame expand vertically
+            self.frame.grid_columnconfigure(0, weight=1)  # To make all columns in the main window expand horizontally
             self.config_frame.grid_rowconfigure(7, weight=1)  # To allow system config labels to take up space
             self.config_frame.grid_columnconfigure(1, weight=1)  # To make the system config values expand horizontally
             self.logs_tree.bind("<Button-3>", self.show_context_menu)  # Button-3 represents the right mouse button
@@ -208,200 +345,518 @@ class LogProcessor:
         self.activity_filter = activity_filter
         self.error_filter = error_filter
         # Re-populate the treeview with the current filter criteria
-        self.populate_treeview(0)
+        self.populate_treeview()
 
 
     def on_frame_configure(self, event):
-        logging.debug("Frame reconfigured. Updating canvas scrollregion.")
         self.logs_canvas.configure(scrollregion=self.logs_canvas.bbox("all"))
 
-    def parse_log(self, timestamp, log_data):
-  
-        log_data["timestamp"] = timestamp  # Adding the timestamp to the dictionary
-        return log_data
-    
     def remove_filter(self):
         # Function to remove the applied filter
         self.activity_filter_combobox.set('')  # Clear the activity name filter
         self.error_filter_var.set('Any')  # Reset the error filter to 'Any'
         self.apply_filter()  # Re-apply the filter, which will now show all data
 
-    def process_parsed_data(self, parsed_log_data):    
+    def on_search_key(self, event):
+        # Search once typing pauses rather than on every key
+        if event.keysym == "Return":
+            return
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(self.search_delay, self.apply_search)
+
+    def apply_search(self):
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+            self.search_after = None
+        query = self.search_entry.get()
+        if query and self.search_regex_var.get():
+            try:
+                re.compile(query)
+            except re.error as e:
+                self.search_status.config(text=f"Invalid regex: {e}")
+                return
+        self.search_query = query
+        self.search_regex = self.search_regex_var.get()
+        self.search_raw = self.search_raw_var.get()
+        self.populate_treeview()
 
-       # Assuming the parsed_log_data contains keys 'Activity Name', 'Status', 'Executed Branch', 'Output Result', and 'Error Message'
-        try:
-            activity_name = parsed_log_data.get('activity_name', 'N/A')
-            status = parsed_log_data.get('status', 'N/A')
-            executed_branch = parsed_log_data.get('executed_branch', 'N/A')
-            output_result = parsed_log_data.get('output_result', 'N/A')
-            error_message = parsed_log_data.get('error_message', 'N/A')
-            timestamp = parsed_log_data.get('timestamp', 'N/A')
-            
-            unique_id = str(uuid.uuid4())
+    def clear_search(self):
+        self.search_entry.delete(0, tk.END)
+        self.apply_search()
 
-            # Store the full parsed data in the dictionary using the unique ID as the key
-            self.full_log_data[unique_id] = parsed_log_data
+    def start_search(self, rows):
+        """
+        Search rows for the current query. Matches are added to view_rows in
+        steps of event_budget milliseconds, so the grid fills while the search runs.
+        """
+        search = logengine.iter_search(self.store, self.search_query, self.search_regex, self.search_raw, rows)
+        if self.search is not None:
+            # Rows appended while a search runs are searched after the rows before them
+            self.search = itertools.chain(self.search, search)
+            return
+        self.search = search
+        self.search_status.config(text="Searching...")
+        self.root.after(1, self.step_search, self.search_generation)
+
+    def step_search(self, generation):
+        if generation != self.search_generation or self.search is None:
+            return  # The search was restarted or cleared since this step was scheduled
+        deadline = time.perf_counter() + self.event_budget / 1000
+        found = array('I')
+        finished = False
+        with self.store.stats.timed("search"):
+            while time.perf_counter() < deadline:
+                try:
+                    found.extend(next(self.search))
+                except StopIteration:
+                    finished = True
+                    break
+        if found:
+            self.view_rows.extend(found)
+            self.render_view()
+        if finished:
+            self.search = None
+            self.search_status.config(text=f"{len(self.view_rows)} matches")
+            self.refresh_analytics()
+        else:
+            self.search_status.config(text=f"Searching... {len(self.view_rows)} matches")
+            self.root.after(1, self.step_search, generation)
 
+    def populate_treeview(self):
+        try:
+            rows = self.store.filter_rows(self.activity_filter, self.error_filter, time_range=self.time_range)
+            if self.cluster_rows is not None:
+                rows = logengine.intersect_rows([rows, self.cluster_rows])
+            self.search_generation += 1
+            self.search = None
+            if self.search_query:
+                self.view_rows = array('I')  # Filled by step_search
+                self.start_search(rows)
+            else:
+                self.view_rows = rows
+                self.search_status.config(text="")
+            self.view_top = 0
+            self.selected_row_id = None
+            self.render_view()
+            self.adjust_column_width()
+            self.refresh_analytics()
+        except Exception as e:
+            logging.error(f"Error populating treeview: {e}\n{traceback.format_exc()}")
 
-            # Populate a dictionary with the parsed data
-            treeview_log_entry = {
-                "UUID": unique_id,
-                "Time": timestamp,
-                "Activity Name": activity_name,
-                "Status": status,
-                "Executed Branch": executed_branch,
-                "Output Result": output_result,
-                "Error Message": error_message
-            }
-            
-            # Append the dictionary to treeview_data
-            self.treeview_data.append(treeview_log_entry)
+    def refresh_timeline(self):
+        """
+        Take the histogram of the rows loaded so far and redraw the timeline.
+        """
+        try:
+            self.histogram = self.store.time_histogram()
         except Exception as e:
-            logging.error(f"Error processing parsed data: {e}\n{traceback.format_exc()}")   
+            logging.error(f"Error building the timeline: {e}\n{traceback.format_exc()}")
+            self.histogram = None
+        self.draw_timeline()
 
-    def populate_treeview(self, start_index):
-        logging.debug("Populating the treeview with the parsed information.")
+    def timeline_span(self):
+        if self.timeline_view is not None:
+            return self.timeline_view
+        return self.histogram.start, max(self.histogram.end, self.histogram.start + 1)
 
-        # Clear the treeview before populating
-        if start_index == 0:
-            self.logs_tree.delete(*self.logs_tree.get_children())
+    def timeline_time(self, x):
+        start, end = self.timeline_span()
+        return start + (end - start) * min(max(x, 0), self.timeline.winfo_width()) / max(self.timeline.winfo_width(), 1)
 
-        end_index = start_index + self.chunk_size
-        try:
-            end_index = start_index + self.chunk_size
-
-            for log_entry in list(self.treeview_data)[start_index:end_index]:
-                unique_id = log_entry["UUID"]
-                timestamp = log_entry.get("Time", "")
-                activity_name = log_entry.get("Activity Name", "").lower()
-
-                executed_branch = log_entry.get("Executed Branch", "")
-                output_result = log_entry.get("Output Result", "")
-                status = log_entry.get("Status", "")
-                error_message = log_entry.get("Error Message", "")
-                # Filtering logic
-                
-                if self.activity_filter and self.activity_filter not in activity_name:
-                    continue  # Skip this log entry if it doesn't match the activity name filter
-                if self.error_filter == "Yes" and status != "error":
-                    continue  # Skip this log entry if error filter is "Yes" and status is not "error"
-                if self.error_filter == "No" and status == "error":
-                    continue  
-
-                # Insert the values into the treeview
-                iid = self.logs_tree.insert("", "end", text=json.dumps(log_entry), tags=(unique_id, 'documentation'),
-                                            values=(timestamp, activity_name, status, executed_branch, output_result,
-                                                    error_message))
-                # Check for "error" status within the loop and update background color
-                if status == "error":
-                    current_tags = self.logs_tree.item(iid, 'tags')
-                    new_tags = current_tags + ('error',)
-                    self.logs_tree.item(iid, tags=new_tags)
+    def timeline_x(self, value):
+        start, end = self.timeline_span()
+        return (value - start) / (end - start) * self.timeline.winfo_width()
 
-            self.adjust_column_width()
-            self.update_progress_after_chunk(end_index)
+    def draw_timeline(self):
+        """
+        Draw rows (grey) and errors (red) per bucket of the timeline, from the histogram
+        level that gives about one bar per two pixels.
+        """
+        self.timeline.delete("all")
+        if self.histogram is None or self.histogram.start is None:
+            self.timeline_label.config(text="")
+            return
+        canvas_width = self.timeline.winfo_width()
+        canvas_height = self.timeline.winfo_height()
+        start, end = self.timeline_span()
+        width, first, counts, errors = self.histogram.level(start, end, max(canvas_width // 2, 1))
+        self.timeline_width = width
+        low = max(0, int((start - first) // width))
+        high = min(len(counts), int((end - first) // width) + 1)
+        peak = max(counts[low:high], default=0) or 1
+        bar = max(width / (end - start) * canvas_width, 1)
+        for bucket in range(low, high):
+            x = self.timeline_x(first + bucket * width)
+            for count, color in ((counts[bucket], "grey"), (errors[bucket], "red")):
+                if count:
+                    top = canvas_height - max(count / peak * (canvas_height - 2), 1)
+                    self.timeline.create_rectangle(x, top, x + bar, canvas_height, fill=color, width=0)
+        if self.time_range is not None:
+            self.timeline.create_rectangle(self.timeline_x(self.time_range[0]), 0,
+                                           self.timeline_x(self.time_range[1]), canvas_height,
+                                           outline="blue", fill="blue", stipple="gray25")
+        text = f"{format_time(start)} to {format_time(end)}, {format_seconds(width)} per bar"
+        if self.time_range is not None:
+            text += f" - showing {format_time(self.time_range[0])} to {format_time(self.time_range[1])}"
+        self.timeline_label.config(text=text)
+
+    def on_timeline_press(self, event):
+        self.timeline_press = event.x
+
+    def on_timeline_drag(self, event):
+        if self.timeline_press is None:
+            return
+        self.timeline.delete("drag")
+        self.timeline.create_rectangle(self.timeline_press, 0, event.x, self.timeline.winfo_height(),
+                                       outline="blue", tags="drag")
 
-        except Exception as e:
-            logging.error(f"Error populating treeview: {e}\n{traceback.format_exc()}")
+    def on_timeline_release(self, event):
+        """
+        A click jumps the grid to the clicked time, a drag shows only the dragged time range.
+        """
+        press, self.timeline_press = self.timeline_press, None
+        if press is None or self.histogram is None or self.histogram.start is None:
+            return
+        if abs(event.x - press) < 3:
+            self.jump_to_time(self.timeline_time(event.x))
+        else:
+            self.set_time_range(tuple(sorted((self.timeline_time(press), self.timeline_time(event.x)))))
 
-    def process_log_file(self, file_path):
-        try:
-            total_size = os.path.getsize(file_path)
-            processed_size = 0
-            chunks = []  # Initialize a list to store decoded chunks
-
-            with io.BufferedReader(io.FileIO(file_path, 'r')) as file:
-                while True:
-                    chunk = file.read(8192)
-                    if not chunk:
-                        break  # Exit the loop if we've reached the end of the file
-                    processed_size += len(chunk)
-
-                    # Append the decoded chunk to the chunks list
-                    chunks.append(chunk.decode('utf-8', errors='replace'))
-
-            # Join the chunks to form the buffer
-            buffer = ''.join(chunks)
-
-            # Now, process the buffer
-            lines = buffer.split('\n')
-            for log_line in lines:
-                if " " in log_line:
-                    timestamp, log_data_str = log_line.split(" ", 1)
-                else:
-                    continue  # Skip to the next line
-                try:
-                    log_data = json.loads(log_data_str)
-                except json.JSONDecodeError:
-                    print(f"Could not decode JSON: {log_data_str}")
-                    continue  # Skip to the next line
-                system_config = self.extract_system_config(timestamp, log_data)
-                if system_config:
-                    for key, value in system_config.items():
-                        self.config_labels[key].config(text=value)
+    def on_timeline_wheel(self, event):
+        """
+        Zoom the timeline in or out around the time under the mouse.
+        """
+        if self.histogram is None or self.histogram.start is None:
+            return
+        zoom_in = event.num == 4 or event.delta > 0
+        start, end = self.timeline_span()
+        center = self.timeline_time(event.x)
+        scale = 0.8 if zoom_in else 1.25
+        full_start, full_end = self.histogram.start, max(self.histogram.end, self.histogram.start + 1)
+        start = max(full_start, center - (center - start) * scale)
+        end = min(full_end, center + (end - center) * scale)
+        self.timeline_view = None if (start, end) == (full_start, full_end) else (start, max(end, start + 0.001))
+        self.draw_timeline()
+
+    def jump_to_time(self, value):
+        """
+        Scroll the grid to the first shown row logged at or after value.
+        """
+        rows = self.store.time_rows(value, value + self.timeline_width)  # The clicked bar
+        if not len(rows):
+            rows = self.store.time_rows(value, math.inf)
+        if not len(rows):
+            return
+        position = bisect.bisect_left(self.view_rows, rows[0])
+        if position < len(self.view_rows):
+            self.selected_row_id = self.view_rows[position]
+            self.view_top = position
+            self.render_view()
+
+    def set_time_range(self, time_range):
+        self.time_range = time_range
+        self.populate_treeview()
+        self.draw_timeline()
+
+    def clear_time_range(self):
+        self.timeline_view = None
+        self.set_time_range(None)
+
+    def render_view(self):
+        """
+        Show the page of view_rows starting at view_top.
+        The Treeview keeps one item per visible slot and only their values are swapped.
+        """
+        total = len(self.view_rows)
+        self.view_top = max(0, min(self.view_top, total - self.page_size))
+        rows = self.view_rows[self.view_top:self.view_top + self.page_size]
+        with self.store.stats.timed("treeview insert"):
+            slots = len(self.logs_tree.get_children())
+            for slot, row in enumerate(rows):
+                timestamp, activity_name, status, executed_branch, output_result, error_message = self.store.row_values(row)
+                values = (timestamp, activity_name.lower(), status, executed_branch, output_result, error_message)
+                source = self.store.source(row)
+                if source is not None:
+                    values += (f"{os.path.basename(source[0])} ({source[1]})",)
+                tags = ('documentation', 'error') if status == "error" else ('documentation',)
+                if slot < slots:
+                    self.logs_tree.item(str(slot), values=values, tags=tags)
                 else:
-                    parsed_log_data = self.parse_log(timestamp, log_data)
-                    if parsed_log_data:
-                        self.process_parsed_data(parsed_log_data)
-
-                self.update_progress(processed_size, total_size)
-
+                    self.logs_tree.insert("", "end", iid=str(slot), values=values, tags=tags)
+            for slot in range(len(rows), slots):
+                self.logs_tree.delete(str(slot))
+        self.visible_rows = list(rows)
+
+        # Keep the selection on the same log entry while its slot changes
+        if self.selected_row_id in self.visible_rows:
+            self.logs_tree.selection_set(str(self.visible_rows.index(self.selected_row_id)))
+        else:
+            self.logs_tree.selection_set(())
 
-            #self.populate_treeview(0)
+        if total:
+            self.v_scrollbar.set(self.view_top / total, (self.view_top + len(rows)) / total)
+        else:
+            self.v_scrollbar.set(0, 1)
+
+    def scroll_view(self, top):
+        top = max(0, min(top, len(self.view_rows) - self.page_size))
+        if top != self.view_top:
+            self.view_top = top
+            self.render_view()
+
+    def on_virtual_yview(self, *args):
+        # Scrollbar commands are mapped onto the whole view instead of the Treeview items
+        if args[0] == "moveto":
+            self.scroll_view(int(float(args[1]) * len(self.view_rows)))
+        elif args[0] == "scroll":
+            step = self.page_size if args[2] == "pages" else 1
+            self.scroll_view(self.view_top + int(args[1]) * step)
+
+    def on_tree_configure(self, event):
+        row_height = self.row_height()
+        # Leave room for the headings row
+        page_size = max(1, (event.height - row_height - 4) // row_height)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.render_view()
+
+    def row_height(self):
+        children = self.logs_tree.get_children()
+        bbox = self.logs_tree.bbox(children[0]) if children else None
+        if bbox:
+            return bbox[3]
+        height = ttk.Style().lookup("Treeview", "rowheight")
+        return int(height) if height else tkFont.nametofont("TkDefaultFont").metrics("linespace") + 2
+
+    def on_tree_select(self, event):
+        selection = self.logs_tree.selection()
+        if selection and int(selection[0]) < len(self.visible_rows):
+            self.selected_row_id = self.visible_rows[int(selection[0])]
+
+    def on_key_scroll(self, event):
+        # Arrow and page keys scroll the view once the selection reaches the edge of the page
+        selection = self.logs_tree.selection()
+        slot = int(selection[0]) if selection else 0
+        if event.keysym == "Prior":
+            self.scroll_view(self.view_top - self.page_size)
+        elif event.keysym == "Next":
+            self.scroll_view(self.view_top + self.page_size)
+        elif event.keysym == "Up" and slot == 0:
+            self.scroll_view(self.view_top - 1)
+            self.select_slot(0)
+        elif event.keysym == "Down" and slot >= len(self.visible_rows) - 1:
+            self.scroll_view(self.view_top + 1)
+            self.select_slot(len(self.visible_rows) - 1)
+        else:
+            return None
+        return "break"
 
+    def select_slot(self, slot):
+        if 0 <= slot < len(self.visible_rows):
+            self.selected_row_id = self.visible_rows[slot]
+            self.logs_tree.selection_set(str(slot))
+            self.logs_tree.focus(str(slot))
 
+    def process_log_file(self, file_paths, events, cancel, line_filter=None, memory_mapped=False, parallel=False,
+                         database=None):
+        """
+        Parse log files on the worker thread, posting everything the UI needs to events.
+        Several files are merged into one timeline. Rows go out in batches,
+        progress only when the percentage changes, and ("done", ...) is always
+        the last event. Tk is never touched here. The load stops soon after
+        cancel is set. With a database the rows are written there instead and
+        only their number is posted as they are committed.
+        """
+        fingerprint = None
+        end_offset = 0
+        if database is not None:
+            loader = logengine.SQLiteStore(database, on_commit=lambda rows: events.put(("committed", rows)))
+            memory_mapped = parallel = False  # The database needs the text of every row
+        else:
+            loader = logengine.BatchingStore(lambda batch: events.put(("rows", batch)))
+        loader.line_filter = line_filter
+        loader.stats.sample_every = self.perf_sample_every
+        last_percent = -1
+
+        def on_progress(processed_size, total_size):
+            nonlocal last_percent
+            percent = processed_size * 100 // total_size
+            if percent != last_percent:
+                last_percent = percent
+                events.put(("progress", percent))
+
+        file_path = file_paths[0]
+        if logengine.is_compressed(file_path):
+            # A decompressed stream can only be read front to back
+            memory_mapped = parallel = False
+        try:
+            if database is not None:
+                # Taken before parsing, like the parse cache fingerprint
+                source_fingerprint = logengine.SQLiteStore.fingerprint(file_paths) if line_filter is None else None
+            elif len(file_paths) == 1 and not logengine.is_compressed(file_path):
+                fingerprint = logengine.file_fingerprint(file_path)
+            if len(file_paths) > 1:
+                # Merged logs are not cached, each part is cached when it is opened on its own
+                system_config = logengine.merge_log_files(file_paths, loader, on_progress, line_filter, cancel,
+                                                          keep_lines=not memory_mapped)
+            elif parallel:
+                # Workers decode byte ranges in separate processes, rows are merged here in file order
+                system_config = logengine.parse_log_parallel(file_path, loader, lazy=memory_mapped,
+                                                             on_progress=on_progress,
+                                                             line_filter=line_filter,
+                                                             executor=self.parse_pool(), cancel=cancel)
+            elif memory_mapped:
+                system_config = logengine.index_log_file(file_path, loader, on_progress,
+                                                         line_filter=line_filter, cancel=cancel)
+            else:
+                # Stream the file line by line so memory depends on the longest line, not the file size
+                system_config = logengine.load_log_file(file_path, loader, on_progress,
+                                                        line_filter=line_filter, cancel=cancel)
+            if database is not None:
+                loader.finish(system_config, source_fingerprint)
+            else:
+                loader.flush()
+                end_offset = loader.end_offset  # Batches only carry rows, following resumes here
+            if system_config:
+                events.put(("config", system_config))
+        except logengine.LoadCancelled:
+            logging.info(f"Loading {', '.join(file_paths)} was cancelled")
+            fingerprint = None
         except Exception as e:
             logging.error(f"Error procesing the log file: {e}\n{traceback.format_exc()}")
+            fingerprint = None  # Don't cache a partial parse
+        finally:
+            if database is not None:
+                loader.close()
+            events.put(("done", fingerprint, loader.stats, end_offset))
 
+    def drain_events(self, events):
+        """
+        Apply what the parsing thread posted, for at most event_budget milliseconds per call.
+        New rows are shown once per call, so the grid fills while the file is
+        still being parsed and the UI stays responsive.
+        """
+        if events is not self.events:
+            return  # Another file was opened since this load started
+        deadline = time.perf_counter() + self.event_budget / 1000
+        start = len(self.store)
+        done = None
+        progress = None
+        while time.perf_counter() < deadline:
+            try:
+                event = events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "rows":
+                self.store.extend(event[1])
+            elif event[0] == "committed":
+                self.store.refresh()  # SQLite mode, the rows are read back from the database
+            elif event[0] == "progress":
+                progress = event[1]  # Only the latest one is shown
+            elif event[0] == "config":
+                self.show_system_config(event[1])
+            elif event[0] == "done":
+                done = event
+                break
+        if progress is not None:
+            self.update_progress(progress)
+        if len(self.store) > start:
+            self.append_to_view(start, scroll=False)
+            self.refresh_analytics(throttled=True)
+
+        if done is None:
+            # Come back right away while events are piling up
+            self.root.after(1 if events.qsize() else 50, self.drain_events, events)
+            return
+        _, fingerprint, stats, end_offset = done
+        self.store.stats.merge(stats)
+        self.store.end_offset = end_offset
+        self.finish_load()
+        self.adjust_column_width()
+        self.refresh_timeline()
+        self.refresh_analytics()
+        if fingerprint is not None:
+            # Written on the load pool, so a large store doesn't freeze the UI. Following would
+            # append to the store while it is written, so it starts once the entry is saved
+            saving = self.load_pool().submit(self.parse_cache.save, self.current_file, self.store, fingerprint)
+            self.root.after(50, self.finish_save, saving, self.store)
+        else:
+            self.start_following()
 
-    def update_progress_after_chunk(self, end_index):
-        # Assuming total_size is the total number of log entries
-        total_size = len(self.full_log_data)
-        processed_size = end_index
-    
-        if processed_size > total_size:
-            processed_size = total_size
-    
-        progress = (processed_size / total_size) * 100
-        self.progress_var.set(progress)
+    def finish_save(self, saving, store):
+        if not saving.done():
+            self.root.after(50, self.finish_save, saving, store)
+            return
+        if saving.exception() is not None:
+            logging.error(f"Error saving the parse cache: {saving.exception()}")
+        if store is self.store:  # Still the log on screen
+            self.start_following()
+
+    def finish_load(self):
+        self.events = None
+        self.processing_thread = None
+        self.cancel_event = None
+        self.file_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+        self.progress_bar.grid_remove()  # Hide the progress bar
+        self.treeview_loaded = True
+
+    def cancel_load(self):
+        """
+        Stop the running load and drop the rows it read so far.
+        """
+        if self.events is None:
+            return
+        self.cancel_event.set()
+        self.processing_thread.cancel()  # Only succeeds while the load is still queued on the pool
+        self.finish_load()
+        self.store.close()
+        self.store = logengine.RecordStore()
+        self.populate_treeview()
+        self.refresh_timeline()
+        self.show_system_config(self.config_defaults)
+        title = f"ElectroNeek Log Parser - {self.files_label()} (cancelled)"
+        self.current_file = None
+        self.current_files = []
+        self.set_title(title)
+
+    def files_label(self):
+        if not self.current_files:
+            return "No file"
+        if len(self.current_files) == 1:
+            return os.path.basename(self.current_files[0])
+        return f"{len(self.current_files)} merged files"
+
+    def show_source_column(self, show):
+        columns = self.logs_tree["columns"]
+        self.logs_tree["displaycolumns"] = columns if show else [col for col in columns if col != "Source"]
+
+    def set_title(self, title):
+        self.title = title
+        if self.tabs is not None:
+            self.tabs.update_title(self)
+        else:
+            self.root.title(title)
 
-    def start_processing(self, file_path):
-        self.treeview_loaded = False
-        self.progress_var.set(0)
-        self.processing_thread = threading.Thread(target=self.process_log_file, args=(file_path,))
-        self.processing_thread.start()
-        self.root.after(100, self.check_thread)
+    def load_pool(self):
+        if self.tabs is not None:
+            return self.tabs.load_pool
+        if self._load_pool is None:
+            self._load_pool = ThreadPoolExecutor(max_workers=1)
+        return self._load_pool
 
+    def parse_pool(self):
+        # Parallel parses share the process pool of the tabs, a single window lets each parse start its own
+        return self.tabs.parse_pool if self.tabs is not None else None
 
-    def update_progress(self, processed_size, total_size):
-        progress = (processed_size / total_size) * 70  # Change 100 to 50
-        self.progress_var.set(progress)
-    
+    def update_progress(self, percent):
+        self.progress_var.set(percent)
+
+    def show_system_config(self, system_config):
+        for key, value in system_config.items():
+            self.config_labels[key].config(text=value)
 
-    def extract_system_config(self, timestamp, log_data):
-        try:
-            if "windows" in log_data:
-                memory_in_bytes = log_data["mem"]["capacity"]
-                memory_in_gb = memory_in_bytes / (1024 ** 3)
-                all_hd_details = log_data["hdd"]
-                formatted_hd_list = [
-                    f"Type: {hd['interface_type']}, Size: {hd['size'] / (1024 ** 3):.2f} GB, Status: {hd['status']}"
-                    for hd in all_hd_details
-                ]
-                formatted_hd_details = '\n'.join(formatted_hd_list)
-                system_config = {
-                    "Windows Version": log_data["windows"]["version"],
-                    "CPU Name": log_data["cpu"]["name"],
-                    "CPU Cores": log_data["cpu"]["number_of_cores"],
-                    "Memory Ram": f"{memory_in_gb:.2f} GB",
-                    "Hard Drive Details": formatted_hd_details,
-                    "Computer Manufacturer": log_data["computer"]["manufacturer"],
-                    "Computer Model": log_data["computer"]["model"]
-                }
-                return system_config
-        except (KeyError, TypeError):
-            return None
-        
     def adjust_column_width(self):
         for col in self.logs_tree["columns"]:
             self.logs_tree.column(col, width=tkFont.Font().measure(col.title()), minwidth=50, stretch=tk.YES)
@@ -411,32 +866,319 @@ class LogProcessor:
         if not self.treeview_loaded:  # Check the flag before proceeding
             return
 
-        file_path = filedialog.askopenfilename(title="Select Log File", 
-                                               filetypes=[("Robot Runner Logs", "robot_autolog_*.log"),
-                                                          ("Studio Pro Logs", "autolog_*.log"),])
-        if file_path:
+        # Selecting several files (rotated parts of a run, or logs of several machines) merges them
+        file_paths = self.ask_log_files()
+        if file_paths:
+            self.load_files(file_paths)
+
+    def ask_log_files(self):
+        """
+        Ask for one or more log files, returning them only if they are all valid.
+        """
+        file_paths = filedialog.askopenfilenames(title="Select Log Files", 
+                                                 filetypes=[("Robot Runner Logs", "robot_autolog_*.log"),
+                                                            ("Studio Pro Logs", "autolog_*.log"),
+                                                            ("Compressed Logs", "*.gz *.bz2 *.xz *.zip"),])
+        if not file_paths:
+            return None
+        try:
+            # A zip archive stands for the logs it holds
+            file_paths = logengine.expand_log_paths(file_paths)
+        except (OSError, zipfile.BadZipFile) as e:
+            messagebox.showerror("Invalid Archive", str(e))
+            return None
+        if not file_paths:
+            messagebox.showerror("Invalid Archive", "The selected archive holds no log files.")
+            return None
+        for file_path in file_paths:
             if not self.validate_file_format(file_path):
-                messagebox.showerror("Invalid File Format", "The selected file is not valid.")
+                messagebox.showerror("Invalid File Format", f"The selected file is not valid: {os.path.basename(file_path)}")
+                return None
+        return list(file_paths)
+
+    def open_filtered_file(self):
+        if not self.treeview_loaded:
+            return
+        file_paths = self.ask_log_files()
+        if file_paths:
+            self.load_files_filtered(file_paths)
+
+    def load_files_filtered(self, file_paths):
+        # Only the rows matching the filters currently set are loaded
+        self.activity_filter = self.activity_filter_combobox.get().lower()
+        self.error_filter = self.error_filter_var.get()
+        self.load_files(file_paths, logengine.LineFilter(self.activity_filter, self.error_filter))
+
+    def open_preview(self):
+        if not self.treeview_loaded:
+            return
+        for file_path in self.ask_log_files() or ():
+            self.show_preview(file_path)
+
+    def show_preview(self, file_path):
+        """
+        Show an estimate of a log from a few thousand sampled lines, before loading it.
+        The window offers a full load, a load filtered by the activity and
+        error filters, or skipping the file. Double-clicking an activity puts
+        it in the activity filter.
+        """
+        try:
+            self.root.config(cursor="watch")
+            self.root.update_idletasks()
+            preview = logengine.sample_log(file_path)
+        except Exception as e:
+            logging.error(f"Error previewing {file_path}: {e}\n{traceback.format_exc()}")
+            messagebox.showerror("Preview Failed", f"Could not preview {os.path.basename(file_path)}: {e}")
+            return
+        finally:
+            self.root.config(cursor="")
+        if preview is None:
+            messagebox.showinfo("Empty File", f"{os.path.basename(file_path)} is empty.")
+            return
+
+        preview_window = tk.Toplevel(self.root)
+        preview_window.title(f"Preview - {os.path.basename(file_path)}")
+        preview_window.geometry("640x560")
+
+        estimated_rows = preview["estimated_rows"]
+        if estimated_rows is None:
+            rows_text = f"at least {preview['sampled']} (compressed, only the first lines were sampled)"
+        else:
+            rows_text = f"about {estimated_rows}"
+        fields = [("File", file_path), ("Size", logengine.format_size(preview["bytes"])),
+                  ("Estimated rows", rows_text),
+                  ("Sampled rows", f"{preview['sampled']} in {preview['seconds']} s"
+                                   + ("" if preview["complete"] else " (stopped at the time budget)")),
+                  ("Error rate", f"{preview['error_rate']:.1%}")]
+        if preview["start_time"] is not None:
+            fields += [("First entry", format_time(preview["start_time"])),
+                       ("Last entry", format_time(preview["end_time"])),
+                       ("Time span", str(timedelta(seconds=round(preview["end_time"] - preview["start_time"]))))]
+        fields += list((preview["system_config"] or {"System config": "not found in the first lines"}).items())
+        summary_frame = tk.Frame(preview_window)
+        summary_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+        for index, (key, value) in enumerate(fields):
+            tk.Label(summary_frame, text=f"{key}:").grid(row=index, column=0, sticky='nw')
+            tk.Label(summary_frame, text=value, justify=tk.LEFT, wraplength=460).grid(row=index, column=1, sticky='w')
+
+        columns = ("sampled", "share", "estimated")
+        activities_tree = ttk.Treeview(preview_window, columns=columns)
+        activities_tree.heading("#0", text="Activity")
+        activities_tree.column("#0", width=260)
+        for col, text in zip(columns, ("Sampled", "Share", "Estimated Rows")):
+            activities_tree.heading(col, text=text)
+            activities_tree.column(col, width=100, anchor="e")
+        activities_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        for activity, count in preview["activities"].items():
+            share = count / preview["sampled"]
+            activities_tree.insert("", "end", text=activity.lower(), values=(
+                count, f"{share:.1%}", "" if estimated_rows is None else f"~{round(share * estimated_rows)}"))
+
+        def on_double_click(event):
+            item = activities_tree.focus()
+            if item:
+                self.activity_filter_combobox.set(activities_tree.item(item, "text"))
+
+        def load(filtered):
+            preview_window.destroy()
+            if not self.treeview_loaded:
+                return  # Another load started meanwhile
+            if filtered:
+                self.load_files_filtered([file_path])
+            else:
+                self.load_file(file_path)
+
+        activities_tree.bind("<Double-1>", on_double_click)
+        controls = tk.Frame(preview_window)
+        controls.pack(fill=tk.X, padx=10, pady=(0, 10))
+        tk.Button(controls, text="Full Load", command=lambda: load(False)).pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Filtered Load", command=lambda: load(True)).pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Skip", command=preview_window.destroy).pack(side=tk.LEFT, padx=5)
+
+    def load_file(self, file_path, line_filter=None):
+        self.load_files([file_path], line_filter)
+
+    def load_files(self, file_paths, line_filter=None):
+        """
+        Load one log file, or merge several into one timeline ordered by timestamp.
+        """
+        database = None
+        cached_store = None
+        if self.sqlite_var.get():
+            database = logengine.SQLiteStore.database_path(file_paths, line_filter)
+            # A finished database of unchanged files is reopened as it is, a filtered load makes its own
+            cached_store = logengine.SQLiteStore.open_finished(file_paths) if line_filter is None else None
+            if cached_store is None and self.tabs is not None and any(getattr(processor.store, 'database', None) == database
+                                             for processor in self.tabs.processors if processor is not self):
+                # Reloading would replace the database under the other tab
+                messagebox.showerror("Database In Use", "These logs are open in SQLite mode in another tab, "
+                                                        "close that tab before loading them again.")
                 return
+        self.logs_tree.delete(*self.logs_tree.get_children())
+        self.store.close()
+        self.view_rows = range(0)
+        self.visible_rows = []
+        self.current_files = list(file_paths)
+        self.current_file = file_paths[0] if len(file_paths) == 1 else None  # Merged logs are not followed
+        self.follower = None
+        self.events = None  # Drops the events of a load still running
+        self.time_range = None
+        self.timeline_view = None
+        self.cluster_rows = None
+        self.show_source_column(len(file_paths) > 1)
+
+        title = f"ElectroNeek Log Parser - {self.files_label()}"
+        self.set_title(title + " (filtered load)" if line_filter else title)
+
+        # An unchanged file that was opened before is shown straight from the parse cache,
+        # a filtered load then just filters the cached rows
+        if database is None:
+            cached_store = self.parse_cache.load(self.current_file) if self.current_file else None
+        if cached_store is not None:
+            self.store = cached_store
+            self.store.stats.sample_every = self.perf_sample_every
+            if cached_store.system_config:
+                self.show_system_config(cached_store.system_config)
+            self.populate_treeview()
+            self.refresh_timeline()
+            self.refresh_analytics()
+            self.start_following()
+            return
 
-            # If we get here, the file is valid
-            self.logs_tree.delete(*self.logs_tree.get_children())
-            self.treeview_loaded = False 
-            self.file_button.config(state="disabled")  # Disable the Open File button
-            self.progress_bar.grid()  # Show the progress bar
-            self.processing_thread = threading.Thread(target=self.process_log_file, args=(file_path,))
-            self.processing_thread.start()
-            self.root.after(100, self.check_thread)
-
-    def check_thread(self):
-        if self.processing_thread.is_alive():
-            self.root.after(100, self.check_thread)
+        # Rows parsed on the worker thread reach this store through the events queue
+        if database is not None:
+            try:
+                self.store = logengine.SQLiteStore.create(database)
+            except (OSError, sqlite3.Error) as e:
+                logging.error(f"Error creating the database {database}: {e}\n{traceback.format_exc()}")
+                messagebox.showerror("Database Error", f"Could not create the SQLite database: {e}")
+                self.store = logengine.RecordStore()
+                self.populate_treeview()
+                self.refresh_timeline()
+                return
         else:
-            self.file_button.config(state="normal")
-            self.populate_treeview(0)
-            self.progress_bar.grid_remove()  # Hide the progress bar
-            self.treeview_loaded = True 
-            self.root.update_idletasks()
+            self.store = logengine.RecordStore()
+        self.store.path = self.current_file
+        self.store.line_filter = line_filter
+        self.store.stats.sample_every = self.perf_sample_every
+        self.populate_treeview()
+        self.refresh_timeline()
+        self.treeview_loaded = False 
+        self.file_button.config(state="disabled")  # Disable the Open File button
+        self.cancel_button.config(state="normal")
+        self.progress_var.set(0)
+        self.progress_bar.grid()  # Show the progress bar
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        # Loads of all tabs share a bounded pool, a load waits there while the pool is busy
+        self.processing_thread = self.load_pool().submit(self.process_log_file, self.current_files, self.events,
+                                                         self.cancel_event, line_filter,
+                                                         self.memory_mapped_var.get(), self.parallel_var.get(),
+                                                         database)
+        self.root.after(1, self.drain_events, self.events)
+
+    def toggle_follow(self):
+        if self.follow_var.get():
+            if self.treeview_loaded:
+                self.start_following()
+        else:
+            self.follower = None  # The pending poll sees this and stops
+
+    def start_following(self):
+        if not self.follow_var.get() or self.current_file is None or self.follower is not None:
+            return
+        if logengine.is_compressed(self.current_file) or not isinstance(self.store, logengine.RecordStore):
+            return  # Archived logs don't grow, and SQLite stores are not followed
+        try:
+            self.follower = logengine.LogFollower.resume(self.current_file, self.store)
+        except OSError as e:
+            logging.error(f"Could not follow {self.current_file}: {e}")
+            return
+        self.root.after(self.follow_interval, self.poll_follow, self.follower)
+
+    def poll_follow(self, follower):
+        if follower is not self.follower:
+            return  # Following was stopped or restarted since this poll was scheduled
+        # The appended data is read and parsed on the load pool, its rows come back through an events queue
+        batch = logengine.RecordStore(index_text=self.store.index_text)
+        batch.line_filter = self.store.line_filter
+        keep_lines = len(self.store.lines) == len(self.store)
+        events = queue.Queue()
+        self.load_pool().submit(self.read_followed, follower, batch, keep_lines, events)
+        self.root.after(50, self.drain_follow_events, follower, events)
+
+    def read_followed(self, follower, batch, keep_lines, events):
+        """
+        Poll a followed file into batch on a worker thread. Posts ("config", ...)
+        and ("rows", batch) for what was read and then ("polled", pending bytes),
+        or only ("replaced",) when the file has to be loaded again. Tk is never touched here.
+        """
+        pending = 0
+        try:
+            added = follower.poll(batch, keep_lines=keep_lines)
+            if added is None:
+                events.put(("replaced",))
+                return
+            if batch.system_config:
+                events.put(("config", batch.system_config))
+            if added:
+                events.put(("rows", batch))
+            pending = follower.pending()
+        except OSError as e:
+            logging.error(f"Error following the log file: {e}")
+        events.put(("polled", pending))
+
+    def drain_follow_events(self, follower, events):
+        if follower is not self.follower:
+            return  # Following was stopped or restarted while the file was read
+        while True:
+            try:
+                event = events.get_nowait()
+            except queue.Empty:
+                self.root.after(50, self.drain_follow_events, follower, events)
+                return
+            if event[0] == "rows":
+                start = len(self.store)
+                self.store.extend(event[1])
+                self.append_to_view(start)
+                self.refresh_timeline()
+                self.refresh_analytics(throttled=True)
+            elif event[0] == "config":
+                self.store.system_config = event[1]
+                self.show_system_config(event[1])
+            elif event[0] == "replaced":
+                # Truncated or rotated: parse the new file from the beginning
+                logging.info(f"{self.current_file} was replaced, loading it again")
+                self.load_file(self.current_file, self.store.line_filter)
+                return
+            elif event[0] == "polled":
+                # Catch up quickly when more than one poll worth of data is waiting
+                delay = 50 if event[1] else self.follow_interval
+                self.root.after(delay, self.poll_follow, follower)
+                return
+
+    def append_to_view(self, start, scroll=True):
+        """
+        Add the rows appended from start on to the current view, keeping the filters.
+        With scroll, a view showing its last row keeps showing the last rows.
+        """
+        at_bottom = scroll and self.view_top + self.page_size >= len(self.view_rows)
+        new_rows = self.store.filter_rows(self.activity_filter, self.error_filter, start, self.time_range)
+        if self.cluster_rows is not None:
+            new_rows = logengine.intersect_rows([new_rows, self.cluster_rows])  # Only rows clustered before
+        if self.search_query:
+            self.start_search(new_rows)  # The matches are added as the search gets to them
+        elif not len(new_rows):
+            pass
+        elif isinstance(new_rows, range) and isinstance(self.view_rows, range) and \
+                (self.view_rows.stop == new_rows.start or not self.view_rows):
+            self.view_rows = range(self.view_rows.start if self.view_rows else new_rows.start, new_rows.stop)
+        else:
+            # A new array, so rows shown before are never changed in place
+            self.view_rows = array('I', self.view_rows) + array('I', new_rows)
+        if at_bottom:
+            self.view_top = len(self.view_rows) - self.page_size
+        self.render_view()
 
 
     def open_documentation(self, event):
@@ -452,8 +1194,7 @@ class LogProcessor:
                 activity_name = "subprogram"
 
             if activity_name == "subprogram":
-                item = event.widget.selection()[0]
-                log_data = json.loads(event.widget.item(item, 'text'))  # Retrieve the JSON string and load it
+                log_data = self.store.record(self.selected_row())
                 file_name_content = log_data.get("fileName", "")  # Assuming the key is "fileName"
                 if file_name_content:
                     activity_name += " (" + file_name_content + ")"
@@ -514,58 +1255,445 @@ class LogProcessor:
         version_label = tk.Label(help_window, text="Version: 1.1", anchor="w", font=font_setting)
         version_label.pack(pady=5, padx=10, anchor="w")
 
-    def format_json_for_display(self, data):
-        formatted_text = json.dumps(data, indent=4)  # Utilize json.dumps for formatting
-        return formatted_text
+    def open_performance(self):
+        """
+        Show the stage counters and timers of the loaded file, with a JSON export.
+        """
+        perf_window = tk.Toplevel(self.root)
+        perf_window.title("Performance")
+        perf_window.geometry("620x320")
+
+        columns = ("stage", "calls", "timed_calls", "seconds", "estimated_seconds")
+        stats_tree = ttk.Treeview(perf_window, columns=columns, show="headings")
+        for col in columns:
+            stats_tree.heading(col, text=col.replace("_", " ").title())
+            stats_tree.column(col, width=110, anchor="w" if col == "stage" else "e")
+        stats_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        controls = tk.Frame(perf_window)
+        controls.pack(fill=tk.X, padx=10, pady=(0, 10))
+        timing_modes = {"Off": 0, "Sampled (1 in 100 lines)": 100, "All lines": 1}
+        timing_var = StringVar(value=next((name for name, every in timing_modes.items()
+                                           if every == self.perf_sample_every), "Off"))
+
+        def set_timing(*args):
+            # Applies to the next load, the current file keeps the numbers it was loaded with
+            self.perf_sample_every = timing_modes[timing_var.get()]
+
+        def refresh():
+            stats_tree.delete(*stats_tree.get_children())
+            for stage, stage_stats in self.store.stats.snapshot()["stages"].items():
+                estimated = stage_stats["estimated_seconds"]
+                stats_tree.insert("", "end", values=(stage, stage_stats["calls"], stage_stats["timed_calls"],
+                                                     f"{stage_stats['seconds']:.4f}",
+                                                     "" if estimated is None else f"{estimated:.4f}"))
+
+        def export():
+            file_path = filedialog.asksaveasfilename(title="Export Performance Stats", defaultextension=".json",
+                                                     filetypes=[("JSON", "*.json")])
+            if not file_path:
+                return
+            report = {
+                "file": self.current_file,
+                "file_size": os.path.getsize(self.current_file) if self.current_file and os.path.exists(self.current_file) else None,
+                "rows": len(self.store),
+                "lines_in_memory": len(self.store.lines) == len(self.store),
+                **self.store.stats.snapshot(),
+            }
+            try:
+                with open(file_path, "w") as file:
+                    json.dump(report, file, indent=4)
+            except OSError as e:
+                logging.error(f"Could not export performance stats: {e}\n{traceback.format_exc()}")
+                messagebox.showerror("Export Failed", str(e))
+
+        tk.Label(controls, text="Timing:").pack(side=tk.LEFT)
+        ttk.OptionMenu(controls, timing_var, timing_var.get(), *timing_modes, command=set_timing).pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Refresh", command=refresh).pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Export JSON", command=export).pack(side=tk.LEFT, padx=5)
+        refresh()
+
+    def open_analytics(self):
+        """
+        Show count, errors and durations per activity for the rows of the current view.
+        Activities with the most total time come first, and each one lists its
+        slowest entries. Double-clicking one of them selects it in the grid.
+        """
+        analytics_window = tk.Toplevel(self.root)
+        analytics_window.title("Run Analytics")
+        analytics_window.geometry("860x400")
+
+        columns = ("count", "errors", "error_rate", "total_seconds", "mean_seconds", "p95_seconds")
+        analytics_tree = ttk.Treeview(analytics_window, columns=columns)
+        analytics_tree.heading("#0", text="Activity")
+        analytics_tree.column("#0", width=220)
+        for col in columns:
+            analytics_tree.heading(col, text=col.replace("_", " ").title())
+            analytics_tree.column(col, width=100, anchor="e")
+        analytics_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+        controls = tk.Frame(analytics_window)
+        controls.pack(fill=tk.X, padx=10, pady=(0, 10))
+        scope_label = tk.Label(controls, text="")
+        slowest_rows = {}  # Row id of every slowest entry item
+
+        def seconds(value):
+            return "" if value is None else f"{value:.3f}"
+
+        def refresh():
+            analytics_tree.delete(*analytics_tree.get_children())
+            slowest_rows.clear()
+            try:
+                summary = self.store.analytics().summary(self.view_rows)
+            except Exception as e:
+                logging.error(f"Error computing run analytics: {e}\n{traceback.format_exc()}")
+                return
+            for activity in summary:
+                item = analytics_tree.insert("", "end", text=activity["activity"].lower(), values=(
+                    activity["count"], activity["errors"], f"{activity['error_rate']:.1%}",
+                    seconds(activity["total_seconds"]), seconds(activity["mean_seconds"]),
+                    seconds(activity["p95_seconds"])))
+                for row, duration in activity["slowest"]:
+                    child = analytics_tree.insert(item, "end", text=self.store.timestamp(row),
+                                                  values=("", "", "", seconds(duration), "", ""))
+                    slowest_rows[child] = row
+            scope = f"{len(self.view_rows)} rows of the current view"
+            if self.store.line_filter is not None:
+                scope += ", no durations: the filtered load dropped the entries between them"
+            scope_label.config(text=scope)
+
+        def on_double_click(event):
+            row = slowest_rows.get(analytics_tree.focus())
+            if row is not None:
+                self.show_row(row)
+
+        def on_close():
+            self.analytics_refresh = None
+            analytics_window.destroy()
+
+        analytics_tree.bind("<Double-1>", on_double_click)
+        analytics_window.protocol("WM_DELETE_WINDOW", on_close)
+        tk.Button(controls, text="Refresh", command=refresh).pack(side=tk.LEFT, padx=5)
+        scope_label.pack(side=tk.LEFT, padx=5)
+        self.analytics_refresh = refresh  # Called again when rows are added
+        refresh()
+
+    def show_row(self, row):
+        """
+        Scroll the grid to a row of the current view and select it.
+        """
+        position = bisect.bisect_left(self.view_rows, row)
+        if position == len(self.view_rows) or self.view_rows[position] != row:
+            messagebox.showinfo("Not Shown", "This entry is not in the current view.")
+            return
+        self.selected_row_id = row
+        self.view_top = max(0, position - self.page_size // 2)
+        self.render_view()
 
-    def display_log_detail(self, event=None):
-        selected_item = self.logs_tree.selection()[0]
-        tags = self.logs_tree.item(selected_item, "tags")
-        unique_id = [tag for tag in tags if tag not in ['documentation', 'error']][0]  # Assuming UID is the only other tag
-        log_data = self.full_log_data[unique_id]
+    def open_error_clusters(self):
+        """
+        Show the error messages of the log grouped into templates, most frequent first.
+        Selecting a template shows only its rows in the grid, until the window is closed.
+        """
+        clusters_window = tk.Toplevel(self.root)
+        clusters_window.title("Error Clusters")
+        clusters_window.geometry("900x400")
+
+        columns = ("count", "first", "last", "activities")
+        clusters_tree = ttk.Treeview(clusters_window, columns=columns)
+        clusters_tree.heading("#0", text="Error Message Template")
+        clusters_tree.column("#0", width=380)
+        for col, width in zip(columns, (70, 160, 160, 200)):
+            clusters_tree.heading(col, text=col.title())
+            clusters_tree.column(col, width=width, anchor="e" if col == "count" else "w")
+        clusters_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+        controls = tk.Frame(clusters_window)
+        controls.pack(fill=tk.X, padx=10, pady=(0, 10))
+        status_label = tk.Label(controls, text="")
+        cluster_rows = {}  # Row ids of the cluster of every item
+
+        def refresh():
+            clusters_tree.delete(*clusters_tree.get_children())
+            cluster_rows.clear()
+            try:
+                clusters = logengine.cluster_errors(self.store)
+            except Exception as e:
+                logging.error(f"Error clustering error messages: {e}\n{traceback.format_exc()}")
+                return
+            for cluster in clusters:
+                activities = sorted(cluster["activities"].items(), key=lambda item: item[1], reverse=True)
+                item = clusters_tree.insert("", "end", text=cluster["template"], values=(
+                    cluster["count"], cluster["first_timestamp"], cluster["last_timestamp"],
+                    ", ".join(f"{activity.lower()} ({count})" for activity, count in activities)))
+                cluster_rows[item] = cluster["rows"]
+            status_label.config(text=f"{sum(map(len, cluster_rows.values()))} errors in {len(cluster_rows)} clusters")
+
+        def on_select(event):
+            rows = cluster_rows.get(clusters_tree.focus())
+            if rows is not None:
+                self.set_cluster_rows(rows)
+
+        def on_close():
+            self.set_cluster_rows(None)
+            clusters_window.destroy()
+
+        clusters_tree.bind("<<TreeviewSelect>>", on_select)
+        clusters_window.protocol("WM_DELETE_WINDOW", on_close)
+        tk.Button(controls, text="Refresh", command=refresh).pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Show All Rows", command=lambda: self.set_cluster_rows(None)).pack(side=tk.LEFT, padx=5)
+        status_label.pack(side=tk.LEFT, padx=5)
+        refresh()
+
+    def set_cluster_rows(self, rows):
+        if rows is None and self.cluster_rows is None:
+            return
+        self.cluster_rows = rows
+        self.populate_treeview()
 
-        # Format the log_data for display
-        formatted_log_data = self.format_json_for_display(log_data)
+    def open_call_tree(self):
+        """
+        Show the subprogram calls, loops and loop iterations of the log as a tree,
+        with the steps, errors and seconds inside every node. A level is only
+        inserted when its node is opened, call_tree_page entries at a time with
+        a "more" item for the rest, so even the largest runs open instantly.
+        Double-clicking an entry selects it in the grid.
+        """
+        if self.store.call_tree() is None:
+            messagebox.showinfo("Call Tree", "The call tree is not available in SQLite storage mode.")
+            return
+        tree_window = tk.Toplevel(self.root)
+        tree_window.title("Call Tree")
+        tree_window.geometry("860x500")
+
+        columns = ("time", "status", "steps", "errors", "seconds")
+        calls_tree = ttk.Treeview(tree_window, columns=columns)
+        calls_tree.heading("#0", text="Activity")
+        calls_tree.column("#0", width=300)
+        for col, width in zip(columns, (180, 80, 80, 80, 90)):
+            calls_tree.heading(col, text=col.title())
+            calls_tree.column(col, width=width, anchor="w" if col in ("time", "status") else "e")
+        calls_tree.tag_configure('error', foreground='red')
+        scrollbar = ttk.Scrollbar(tree_window, orient="vertical", command=calls_tree.yview)
+        calls_tree.configure(yscrollcommand=scrollbar.set)
+        controls = tk.Frame(tree_window)
+        controls.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 10))
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=10)
+        calls_tree.pack(fill=tk.BOTH, expand=True, padx=(10, 0), pady=10)
+        pending = {}  # (node, first entry) still to insert, by placeholder item
+        state = {"tree": self.store.call_tree()}
+
+        def node_text(tree, node):
+            kind, label = tree.kinds[node], tree.labels[node]
+            if kind == logengine.CALL_SUBPROGRAM:
+                return f"subprogram {label}"
+            if kind == logengine.CALL_LOOP:
+                return f"{label.lower()} ({tree.iterations.get(node, 0)} iterations)"
+            return f"iteration {label}"
+
+        def insert_entries(parent_item, node, start):
+            tree = state["tree"]
+            entries = tree.children[node + 1]
+            end = min(start + self.call_tree_page, len(entries))
+            for entry in entries[start:end]:
+                if entry >= 0:
+                    status = self.store.status(entry)
+                    duration = tree.durations[entry]
+                    calls_tree.insert(parent_item, "end", iid=f"r{entry}", text=self.store.activity(entry).lower(),
+                                      values=(self.store.timestamp(entry), status, "", "",
+                                              "" if math.isnan(duration) else f"{duration:.3f}"),
+                                      tags=('error',) if status == "error" else ())
+                else:
+                    child = -1 - entry
+                    item = calls_tree.insert(parent_item, "end", iid=f"n{child}", text=node_text(tree, child),
+                                             values=(self.store.timestamp(tree.label_rows[child]), "",
+                                                     tree.steps[child], tree.errors[child],
+                                                     f"{tree.seconds[child]:.3f}"),
+                                             tags=('error',) if tree.errors[child] else ())
+                    pending[calls_tree.insert(item, "end", text="...")] = (child, 0)  # Makes it expandable
+            if end < len(entries):
+                pending[calls_tree.insert(parent_item, "end", text=f"... {len(entries) - end} more")] = (node, end)
+
+        def expand(item):
+            # Replaces a placeholder (the first child of an unopened node, or a "more" item) by entries
+            node, start = pending.pop(item)
+            parent_item = calls_tree.parent(item)
+            calls_tree.delete(item)
+            insert_entries(parent_item, node, start)
+
+        def on_open(event):
+            item = calls_tree.focus()
+            children = calls_tree.get_children(item)
+            if children and children[0] in pending:
+                expand(children[0])
+
+        def on_select(event):
+            item = calls_tree.focus()
+            if item in pending:
+                expand(item)
+
+        def on_double_click(event):
+            item = calls_tree.focus()
+            if item.startswith("r"):
+                self.show_row(int(item[1:]))
+            elif item.startswith("n"):
+                self.show_row(state["tree"].label_rows[int(item[1:])])
+
+        def refresh():
+            calls_tree.delete(*calls_tree.get_children())
+            pending.clear()
+            state["tree"] = self.store.call_tree()
+            if state["tree"] is not None:
+                insert_entries("", -1, 0)
+                status = f"{len(state['tree'].kinds)} calls, loops and iterations in {len(self.store)} rows"
+                if self.store.line_filter is not None:
+                    status += ", no seconds: the filtered load dropped the entries between them"
+                status_label.config(text=status)
+
+        calls_tree.bind("<<TreeviewOpen>>", on_open)
+        calls_tree.bind("<<TreeviewSelect>>", on_select)
+        calls_tree.bind("<Double-1>", on_double_click)
+        tk.Button(controls, text="Refresh", command=refresh).pack(side=tk.LEFT, padx=5)
+        status_label = tk.Label(controls, text="")
+        status_label.pack(side=tk.LEFT, padx=5)
+        refresh()
+
+    def refresh_analytics(self, throttled=False):
+        if self.analytics_refresh is None:
+            return
+        now = time.perf_counter()
+        if throttled and now - self.analytics_refreshed < self.analytics_interval:
+            return  # Rows keep arriving, the next batch refreshes it
+        self.analytics_refreshed = now
+        self.analytics_refresh()
 
+    def selected_row(self):
+        # Treeview item ids are slots of the visible page, map them back to record store rows
+        return self.visible_rows[int(self.logs_tree.selection()[0])]
 
+    def display_log_detail(self, event=None):
+        """
+        Show the selected log entry pretty-printed, and as a tree of collapsible JSON nodes.
+        The text is added a page of detail_page_chars characters at a time as it
+        is scrolled to its end, and tree nodes are only filled in when opened,
+        so an entry carrying a multi-MB payload opens as fast as a small one.
+        """
+        log_data = self.store.record(self.selected_row())
 
         detail_window = tk.Toplevel(self.root)
 
         detail_window.title("Log Details")
         detail_window.minsize(500, 300)  # Minimum window size for better presentation
+        notebook = ttk.Notebook(detail_window)
+        notebook.pack(pady=10, padx=15, fill='both', expand=True)
+
+        # Pretty-printed text, one page at a time
+        text_frame = tk.Frame(notebook)
+        notebook.add(text_frame, text="Text")
         # Define a font for the log details
         log_font = ('Courier', 10)
         # Create the Text widget and Scrollbar
-        scrollbar = tk.Scrollbar(detail_window)
+        scrollbar = tk.Scrollbar(text_frame)
         scrollbar.pack(side='right', fill='y')
-        log_text = tk.Text(detail_window, wrap='word', font=log_font, yscrollcommand=scrollbar.set)
-        log_text.insert('1.0', formatted_log_data)  # Use formatted_log_data here
-        log_text.pack(pady=10, padx=15, fill='both', expand=True)
+        page_label = tk.Label(text_frame, anchor='w')
+        page_label.pack(side='bottom', fill='x')
+        log_text = tk.Text(text_frame, wrap='word', font=log_font)
+        log_text.pack(fill='both', expand=True)
+        pages = logengine.iter_pretty_json(log_data, self.detail_page_chars)
+        shown = {"chars": 0, "done": False, "queued": False}
+
+        def add_page():
+            shown["queued"] = False
+            page = next(pages, None)
+            if page is None:
+                shown["done"] = True
+                page_label.config(text=f"{shown['chars']} characters")
+                return
+            log_text.config(state='normal')
+            log_text.insert('end', page)
+            log_text.config(state='disabled')  # Make the Text widget read-only
+            shown["chars"] += len(page)
+            page_label.config(text=f"{shown['chars']} characters shown, scroll down for more")
+
+        def on_text_scroll(first, last):
+            scrollbar.set(first, last)
+            if float(last) > 0.9 and not shown["done"] and not shown["queued"]:
+                shown["queued"] = True
+                log_text.after_idle(add_page)
+
         # Associate scrollbar with text widget
+        log_text.config(yscrollcommand=on_text_scroll)
         scrollbar.config(command=log_text.yview)
-        # Make the Text widget read-only
-        log_text.config(state='disabled')
+        add_page()
+
+        # The same entry as a tree of JSON nodes
+        tree_frame = tk.Frame(notebook)
+        notebook.add(tree_frame, text="Tree")
+        json_tree = ttk.Treeview(tree_frame, columns=("value",))
+        json_tree.heading("#0", text="Key")
+        json_tree.heading("value", text="Value")
+        json_tree.column("#0", width=200)
+        json_tree.column("value", width=500)
+        tree_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=json_tree.yview)
+        json_tree.configure(yscrollcommand=tree_scrollbar.set)
+        tree_scrollbar.pack(side='right', fill='y')
+        json_tree.pack(fill='both', expand=True)
+        pending = {}  # (node value, first child) still to insert, by placeholder item
+
+        def insert_children(parent_item, value, start):
+            end = min(start + self.detail_tree_page, len(value))
+            children = itertools.islice(value.items() if isinstance(value, dict) else enumerate(value), start, end)
+            for key, child in children:
+                if isinstance(child, (dict, list)) and child:
+                    size = f"{{{len(child)} keys}}" if isinstance(child, dict) else f"[{len(child)} items]"
+                    item = json_tree.insert(parent_item, "end", text=str(key), values=(size,))
+                    pending[json_tree.insert(item, "end", text="...")] = (child, 0)  # Makes it expandable
+                else:
+                    json_tree.insert(parent_item, "end", text=str(key), values=(logengine.preview_value(child),))
+            if end < len(value):
+                pending[json_tree.insert(parent_item, "end", text=f"... {len(value) - end} more")] = (value, end)
 
+        def expand(item):
+            value, start = pending.pop(item)
+            parent_item = json_tree.parent(item)
+            json_tree.delete(item)
+            insert_children(parent_item, value, start)
 
-    def copy_log_to_clipboard(self):
-        selected_item = self.logs_tree.selection()[0]  # Get the selected treeview item
-        uid = self.logs_tree.item(selected_item, "tags")[0]  # Get the UID from the tags of the selected item
+        def on_open(event):
+            children = json_tree.get_children(json_tree.focus())
+            if children and children[0] in pending:
+                expand(children[0])
+
+        def on_select(event):
+            if json_tree.focus() in pending:
+                expand(json_tree.focus())
 
-        # Fetch the full log data using the UID
-        log_data = self.full_log_data[uid]
+        json_tree.bind("<<TreeviewOpen>>", on_open)
+        json_tree.bind("<<TreeviewSelect>>", on_select)
+        insert_children("", log_data, 0)
 
-        # Convert the dictionary back to a string representation for copying
-        log_str = json.dumps(log_data, indent=4)
 
-        # Use the Tkinter clipboard to copy the log string
+    def copy_log_to_clipboard(self):
+        # Fetch the full log data of the selected row
+        log_data = self.store.record(self.selected_row())
+
+        # Pretty-print it into the clipboard chunk by chunk, without building the whole string
         self.root.clipboard_clear()
-        self.root.clipboard_append(log_str)
+        for chunk in logengine.iter_pretty_json(log_data):
+            self.root.clipboard_append(chunk)
         self.root.update()  # This line is necessary to finalize the clipboard action
 
+    def copy_output_result(self):
+        # The grid only holds the start of long output results, so copy it from the entry itself
+        output_result = self.store.record(self.selected_row()).get('output_result', 'N/A')
+        if isinstance(output_result, str):
+            self.copy_to_clipboard(output_result)
+            return
+        self.root.clipboard_clear()
+        for chunk in logengine.iter_pretty_json(output_result):
+            self.root.clipboard_append(chunk)
+        self.root.update_idletasks()
+
 
     def show_context_menu(self, event):
-        if not self.treeview_loaded:
-            return
         item = self.logs_tree.identify_row(event.y)
         if not item:
             return
@@ -580,9 +1708,7 @@ class LogProcessor:
     
         # Check if the selected item has an 'Output Result' to copy
         if len(selected_values) > 4:  # Check if 'Output Result' index exists
-            output_result = selected_values[4]  # Assuming 'Output Result' is at index 4
-            context_menu.add_command(label="Copy Output Result to Clipboard", 
-                                     command=lambda: self.copy_to_clipboard(output_result))
+            context_menu.add_command(label="Copy Output Result to Clipboard", command=self.copy_output_result)
     
         context_menu.tk_popup(event.x_root, event.y_root)
     def copy_to_clipboard(self, text):
@@ -592,16 +1718,77 @@ class LogProcessor:
         self.root.update_idletasks() 
 
     def on_scroll(self, event):
-        if not self.treeview_loaded:  # Prevent further loading while Treeview is still loading previous data
-            return
+        # Also while a load is running, the rows that arrived so far can be browsed
+        if event.num == 4 or event.delta > 0:
+            self.scroll_view(self.view_top - 3)
+        else:
+            self.scroll_view(self.view_top + 3)
+        return "break"
+
+
+class LogTabs:
+    """
+    Main window with one LogProcessor per tab, so several logs can be loaded and compared at once.
+    The loads of all tabs run on one bounded thread pool, and parallel
+    parses on one shared process pool.
+    """
+    MAX_LOADS = 2  # Files parsed at the same time, further loads wait for a free worker
 
-        # Check if the Treeview is at the bottom
-        if self.logs_tree.yview()[1] == 1.0 and self.current_offset < len(self.treeview_data):
-            self.current_offset += self.chunk_size
-            #self.populate_treeview(self.current_offset)
+    def __init__(self, root):
+        self.root = root
+        self.load_pool = ThreadPoolExecutor(max_workers=self.MAX_LOADS, thread_name_prefix="log-load")
+        self.parse_pool = ProcessPoolExecutor()  # Worker processes only start with the first parallel parse
+        self.processors = []
+        self.root.grid_rowconfigure(0, weight=1)
+        self.root.grid_columnconfigure(0, weight=1)
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.grid(row=0, column=0, sticky='nsew')
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.new_tab()
+
+    def new_tab(self):
+        frame = tk.Frame(self.notebook)
+        self.notebook.add(frame, text="No file")
+        processor = LogProcessor(self.root, frame, self)
+        self.processors.append(processor)
+        self.notebook.select(frame)
+        return processor
+
+    def close_tab(self, processor):
+        processor.cancel_load()
+        processor.follower = None
+        processor.store.close()
+        self.processors.remove(processor)
+        self.notebook.forget(processor.frame)
+        processor.frame.destroy()
+        if not self.processors:
+            self.new_tab()
+
+    def update_title(self, processor):
+        self.notebook.tab(processor.frame, text=processor.files_label())
+        if self.selected() is processor:
+            self.root.title(processor.title)
+
+    def selected(self):
+        frame = self.notebook.select()
+        return next((processor for processor in self.processors if str(processor.frame) == frame), None)
+
+    def on_tab_changed(self, event):
+        processor = self.selected()
+        if processor is not None:
+            self.root.title(processor.title)
+
+    def close(self):
+        for processor in self.processors:
+            processor.cancel_load()
+        self.load_pool.shutdown(wait=False, cancel_futures=True)
+        self.parse_pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Parallel parsing workers in a frozen Windows build
     root = tk.Tk()
-    processor = LogProcessor(root)
+    tabs = LogTabs(root)
     root.mainloop()
\ No newline at end of file